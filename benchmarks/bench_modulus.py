@@ -0,0 +1,174 @@
+"""
+Benchmarks of the modulus solvers on generated graph families.
+
+Generates Erdos--Renyi, grid, Barabasi--Albert and random geometric graphs
+with a given number of edges, runs the basic algorithm for walks, spanning
+trees and the subfamily of stars on each of them, and records wall time,
+iteration count, oracle time, solver time and peak memory in a JSON file.
+Peak memory is measured in a separate run, so that tracing allocations does
+not slow down the timed one.
+
+Run from the root of the project, for example:
+python3 benchmarks/bench_modulus.py --sizes 100 1000 --solvers native CVXOPT
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tracemalloc
+
+import numpy
+import igraph
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+
+from pmodpy import modspans, modsubfamily, modwalks
+
+
+def erdos_renyi(edges, seed):
+    """Erdos--Renyi graph with average degree 6."""
+    igraph.set_random_number_generator(random.Random(seed))
+    return igraph.Graph.Erdos_Renyi(n=max(2, edges // 3), m=edges)
+
+
+def grid(edges, seed):
+    """Square grid graph."""
+    side = max(2, int(round(math.sqrt(edges / 2))))
+    return igraph.Graph.Lattice([side, side], circular=False)
+
+
+def barabasi_albert(edges, seed):
+    """Barabasi--Albert graph with 3 edges per new node."""
+    igraph.set_random_number_generator(random.Random(seed))
+    return igraph.Graph.Barabasi(n=max(4, edges // 3), m=3)
+
+
+def random_geometric(edges, seed):
+    """Random geometric graph in the unit square with average degree 6."""
+    igraph.set_random_number_generator(random.Random(seed))
+    nodes = max(2, edges // 3)
+    return igraph.Graph.GRG(nodes, math.sqrt(6 / (math.pi * nodes)))
+
+
+GENERATORS = {
+    "erdos_renyi": erdos_renyi,
+    "grid": grid,
+    "barabasi_albert": barabasi_albert,
+    "random_geometric": random_geometric,
+}
+
+
+def largest_component(graph):
+    """Restrict a graph to its largest connected component."""
+    return graph.components().giant()
+
+
+def far_pair(graph):
+    """Node 0 and a node farthest from it."""
+    dist = numpy.asarray(graph.distances(0)[0], dtype=float)
+    dist[numpy.isinf(dist)] = -1
+    return 0, int(numpy.argmax(dist))
+
+
+def stars(graph):
+    """The family of stars: the edges incident to each node."""
+    return [graph.incident(v) for v in range(graph.vcount())]
+
+
+def solve(family, graph, p, eps, solver):
+    """Run the basic algorithm once and return its result."""
+    if family == "walks":
+        source, target = far_pair(graph)
+        return modwalks.modulus_walks_density(graph, source, target, p=p,
+                                              eps=eps, solver=solver)
+    if family == "spans":
+        return modspans.modulus_spans_density(graph, p=p, eps=eps,
+                                              solver=solver)
+    if family == "subfamily":
+        return modsubfamily.modulus_subfamily_density(
+            graph, stars(graph), p=p, eps=eps, solver=solver)
+    raise ValueError("Unknown family: %s" % family)
+
+
+def run(family, graph, p, eps, solver, memory=True):
+    """
+    Run the basic algorithm and return its measurements: the times from an
+    untraced run, and the peak memory allocated by Python from a second run
+    under *tracemalloc*, whose tracing would otherwise inflate the times.
+    """
+    result = solve(family, graph, p, eps, solver)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        solve(family, graph, p, eps, solver)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    summary = result.trace.summary()
+    return {
+        "wall_time": summary["wall_time"],
+        "iterations": summary["iterations"],
+        "oracle_time": summary["oracle_time"],
+        "solver_time": summary["solve_time"],
+        "peak_memory": peak,
+        "constraints": result.trace.records[-1]["constraints"],
+        "modulus": float(result[0]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000],
+                        help="target edge counts (up to 100000)")
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS),
+                        choices=list(GENERATORS))
+    parser.add_argument("--families", nargs="+",
+                        default=["walks", "spans", "subfamily"],
+                        choices=["walks", "spans", "subfamily"])
+    parser.add_argument("--solvers", nargs="+", default=["native"])
+    parser.add_argument("--p", type=float, default=2)
+    parser.add_argument("--eps", type=float, default=1e-8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the second run measuring peak memory")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args(argv)
+    p = int(args.p) if args.p == int(args.p) else args.p
+
+    results = []
+    for name in args.generators:
+        for size in args.sizes:
+            graph = largest_component(GENERATORS[name](size, args.seed))
+            for family in args.families:
+                for solver in args.solvers:
+                    record = {
+                        "generator": name,
+                        "target_edges": size,
+                        "nodes": graph.vcount(),
+                        "edges": graph.ecount(),
+                        "family": family,
+                        "solver": solver,
+                        "p": p,
+                        "eps": args.eps,
+                        "seed": args.seed,
+                    }
+                    record.update(run(family, graph, p, args.eps, solver,
+                                      memory=not args.no_memory))
+                    results.append(record)
+                    print("%(generator)s %(edges)d %(family)s %(solver)s: "
+                          "%(wall_time).3fs, %(iterations)d iterations"
+                          % record)
+    with open(args.output, "w") as out:
+        json.dump({"python": platform.python_version(),
+                   "numpy": numpy.__version__,
+                   "igraph": igraph.__version__,
+                   "results": results}, out, indent=1)
+
+
+if __name__ == "__main__":
+    main()
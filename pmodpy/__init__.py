@@ -1,3 +1,2 @@
 import numpy
-import cvxpy
 import igraph
@@ -0,0 +1,145 @@
+"""
+Batch computation of the moduli of many families on a pool of processes.
+
+A job is a dictionary with the keys
+
+    family    -- "walks", "spans" or "subfamily"
+    graph     -- *igraph* object
+    source    -- source node (walks)
+    target    -- target node (walks)
+    subfamily -- family of objects (subfamily)
+    options   -- keyword arguments of the modulus function, such as `p`,
+                 `eps` or `solver`, defaults to none
+
+of which the `graph` is shipped to the workers once, as its edge array in
+shared memory, however many jobs use it. The jobs are submitted in decreasing
+order of estimated cost, so that the largest ones do not end up last, and the
+results are yielded as they finish.
+"""
+
+import concurrent.futures
+import signal
+from multiprocessing import shared_memory
+
+import numpy
+import igraph
+
+# Graphs already rebuilt in a worker, by shared memory block name
+_GRAPHS = {}
+
+
+def _share(graph):
+    # Copy the edge array of `graph` to a new shared memory block and return
+    # the block and the description the workers rebuild the graph from
+    edges = numpy.asarray(graph.get_edgelist(), dtype=numpy.int64)
+    edges = edges.reshape(-1, 2)
+    block = shared_memory.SharedMemory(create=True,
+                                       size=max(edges.nbytes, 1))
+    numpy.ndarray(edges.shape, dtype=numpy.int64, buffer=block.buf)[:] = edges
+    return block, (block.name, edges.shape[0], graph.vcount(),
+                   graph.is_directed())
+
+
+def _attach(shared):
+    # Rebuild a shared graph in a worker, once
+    name, edge_count, vcount, directed = shared
+    if name not in _GRAPHS:
+        block = shared_memory.SharedMemory(name=name)
+        edges = numpy.ndarray((edge_count, 2), dtype=numpy.int64,
+                              buffer=block.buf).tolist()
+        block.close()
+        _GRAPHS[name] = igraph.Graph(n=vcount, edges=edges,
+                                     directed=directed)
+    return _GRAPHS[name]
+
+
+def _alarm(signum, frame):
+    raise TimeoutError("The job exceeded its time limit")
+
+
+def _run(shared, job, timeout):
+    # Compute the modulus of one job in a worker
+    from pmodpy import modspans, modsubfamily, modwalks
+    graph = _attach(shared)
+    options = job.get("options", {})
+    timed = timeout is not None and hasattr(signal, "setitimer")
+    if timed:
+        # Interrupts Python code only, once a running solver call returns
+        signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if job["family"] == "walks":
+            return modwalks.modulus_walks_density(
+                graph, job["source"], job["target"], **options
+            )
+        if job["family"] == "spans":
+            return modspans.modulus_spans_density(graph, **options)
+        if job["family"] == "subfamily":
+            return modsubfamily.modulus_subfamily_density(
+                graph, job["subfamily"], **options
+            )
+        raise ValueError("Unknown family %r" % job["family"])
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def estimate(job):
+    """
+    Return an estimate of the relative cost of a job: the number of edges
+    times the number of nodes for walks and spanning trees, which bounds the
+    work of the oracle calls and the number of iterations, and the number of
+    edges times the number of objects for subfamilies.
+    """
+    graph = job["graph"]
+    if job["family"] == "subfamily":
+        return graph.ecount() * max(len(job["subfamily"]), 1)
+    return graph.ecount() * max(graph.vcount(), 1)
+
+
+def run_batch(jobs, workers=None, timeout=None):
+    """
+    Compute the moduli of a batch of jobs on a pool of processes and yield
+    the position of each job in `jobs` with its result, as they finish.
+
+    The result of a job is that of `modwalks.modulus_walks_density()`,
+    `modspans.modulus_spans_density()` or
+    `modsubfamily.modulus_subfamily_density()`, or the exception it raised,
+    in particular `TimeoutError` if it ran out of time.
+
+    Parameters:
+    jobs    -- sequence of jobs, see `modbatch`
+    workers -- number of processes, defaults to `None`
+               (the number of processors)
+    timeout -- time limit of each job in seconds, defaults to `None` (none);
+               enforced with `SIGALRM` where available, which interrupts the
+               job once a running solver call returns
+
+    """
+    blocks = {}
+    try:
+        # Ship each graph once
+        shared = {}
+        for job in jobs:
+            key = id(job["graph"])
+            if key not in blocks:
+                blocks[key], shared[key] = _share(job["graph"])
+        order = sorted(range(len(jobs)), key=lambda i: -estimate(jobs[i]))
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = {}
+            for i in order:
+                job = {key: value for key, value in jobs[i].items()
+                       if key != "graph"}
+                future = pool.submit(_run, shared[id(jobs[i]["graph"])], job,
+                                     timeout)
+                futures[future] = i
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as error:
+                    result = error
+                yield [futures[future], result]
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
@@ -0,0 +1,211 @@
+"""
+Cache of modulus results, keyed on a canonical hash of the graph and the
+parameters of the computation.
+
+Results are kept in a bounded in-memory tier with least-recently-used
+eviction and, optionally, in an on-disk tier of *numpy* npz files. A result
+for the same graph and parameters but a different tolerance `eps` is a near
+hit: its minimal subfamily seeds the new computation.
+"""
+
+import collections
+import glob
+import hashlib
+import os
+
+import numpy
+import scipy.sparse
+
+from pmodpy import modcore, modsolvers
+
+
+def graph_hash(graph):
+    """
+    Return a hexadecimal sha256 digest of the directedness, node count and
+    edge list of a graph, which determine the modulus and the edge order of
+    its extremal density.
+
+    Parameters:
+    graph -- *igraph* object
+
+    """
+    edges = numpy.asarray(graph.get_edgelist(), dtype=numpy.int64)
+    digest = hashlib.sha256()
+    digest.update(b"directed" if graph.is_directed() else b"undirected")
+    digest.update(numpy.int64(graph.vcount()).tobytes())
+    digest.update(edges.tobytes())
+    return digest.hexdigest()
+
+
+def _digest(*fields):
+    return hashlib.sha256(repr(fields).encode()).hexdigest()
+
+
+def _solver_key(solver):
+    # Engines by class and options rather than by their default repr, which
+    # holds their address, and engine names as the engines they stand for
+    if isinstance(solver, str) and solver in modsolvers.ENGINES:
+        solver = modsolvers.resolve(solver)
+    if solver is None or isinstance(solver, str):
+        return str(solver)
+    kind = type(solver)
+    return "%s.%s%r" % (kind.__module__, kind.__qualname__,
+                        sorted(vars(solver).items()))
+
+
+def _p_key(p):
+    # 2 and 2.0 are the same modulus parameter
+    return p if p == 'inf' else repr(float(p))
+
+
+class ResultCache:
+    """
+    Least-recently-used cache of modulus results with an optional
+    on-disk tier.
+
+    An entry is a dictionary holding the modulus `mod`, the extremal density
+    `rho`, the optimal pmf `mu` (or `None`) and the minimal subfamily `Gamma`
+    as a *scipy* sparse |E(G)|-by-|Gamma| matrix.
+
+    Parameters:
+    maxsize   -- number of entries to keep in memory, defaults to 128
+    directory -- directory of the npz files of the on-disk tier,
+                 defaults to `None` (memory only)
+
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        # Entries in order of use, and the latest full key of each near key
+        self.entries = collections.OrderedDict()
+        self.latest = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, graph, family, source=None, target=None, p=2, eps=1e-8,
+            solver=None, rel_gap=None):
+        """
+        Return the full key of a computation and its near key,
+        which leaves out the tolerances `eps` and `rel_gap`.
+        """
+        near = _digest(graph_hash(graph), family, source, target, _p_key(p))
+        fields = [near, repr(float(eps)), _solver_key(solver)]
+        # An early stop on the gap is a different (coarser) computation
+        if rel_gap is not None:
+            fields.append(repr(float(rel_gap)))
+        return [_digest(*fields), near]
+
+    def _path(self, key, near):
+        return os.path.join(self.directory, "%s.%s.npz" % (near, key))
+
+    def get(self, key):
+        """
+        Return a copy of the entry with full key `key`, or `None`.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return _copy(self.entries[key])
+        if self.directory is None:
+            return None
+        paths = glob.glob(os.path.join(self.directory, "*.%s.npz" % key))
+        if not paths:
+            return None
+        entry = _load(paths[0])
+        near = os.path.basename(paths[0]).split(".")[0]
+        self._remember(key, near, entry)
+        return _copy(entry)
+
+    def near(self, near):
+        """
+        Return a copy of the latest entry with near key `near`, or `None`.
+        """
+        if near in self.latest and self.latest[near] in self.entries:
+            return self.get(self.latest[near])
+        if self.directory is None:
+            return None
+        paths = glob.glob(os.path.join(self.directory, "%s.*.npz" % near))
+        if not paths:
+            return None
+        path = max(paths, key=os.path.getmtime)
+        return self.get(os.path.basename(path).split(".")[1])
+
+    def put(self, key, near, entry):
+        """
+        Store `entry` under the full key `key` and near key `near`.
+        """
+        entry = _copy(entry)
+        self._remember(key, near, entry)
+        if self.directory is not None:
+            _save(self._path(key, near), entry)
+
+    def _remember(self, key, near, entry):
+        # Insert into the memory tier, evicting the least recently used entry
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.latest[near] = key
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the memory tier (the on-disk tier is kept).
+        """
+        self.entries.clear()
+        self.latest.clear()
+
+
+def _copy(entry):
+    # Copy the arrays so that callers cannot alter the cached ones
+    return {
+        "mod": entry["mod"],
+        "rho": numpy.array(entry["rho"]),
+        "mu": None if entry["mu"] is None else numpy.array(entry["mu"]),
+        "Gamma": scipy.sparse.csr_matrix(entry["Gamma"], copy=True),
+    }
+
+
+def _save(path, entry):
+    Gamma = scipy.sparse.csr_matrix(entry["Gamma"])
+    numpy.savez(path, mod=entry["mod"], rho=entry["rho"],
+                mu=numpy.zeros(0) if entry["mu"] is None else entry["mu"],
+                has_mu=entry["mu"] is not None,
+                data=Gamma.data, indices=Gamma.indices, indptr=Gamma.indptr,
+                shape=numpy.asarray(Gamma.shape))
+
+
+def _load(path):
+    with numpy.load(path) as npz:
+        Gamma = scipy.sparse.csr_matrix(
+            (npz["data"], npz["indices"], npz["indptr"]),
+            shape=tuple(npz["shape"])
+        )
+        return {
+            "mod": float(npz["mod"]),
+            "rho": npz["rho"],
+            "mu": npz["mu"] if bool(npz["has_mu"]) else None,
+            "Gamma": Gamma,
+        }
+
+
+def session_entry(mod, rho, session, p=2):
+    """
+    Return the cache entry of a run of the basic algorithm, with the pmf
+    recovered from the multipliers of its last solve (see
+    `modcore.dual_mass`) when p is finite.
+
+    Parameters:
+    mod     -- modulus estimate
+    rho     -- extremal density estimate
+    session -- session after the basic algorithm has run
+    p       -- modulus parameter, defaults to 2
+
+    """
+    mu = None
+    if p != 'inf' and numpy.sum(numpy.maximum(session.lam, 0)) > 0:
+        mu = modcore.dual_mass(session, p=p)[1]
+    return {"mod": float(mod), "rho": numpy.asarray(rho), "mu": mu,
+            "Gamma": session.rows.tocsr().T.tocsr()}
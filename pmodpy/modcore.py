@@ -0,0 +1,697 @@
+"""
+Shared implementation of the basic modulus algorithm (@Albin2014 Algorithm 1)
+for any family of objects that comes with a minimum-object generator.
+"""
+
+import json
+import time
+
+import numpy
+import scipy.sparse
+
+from pmodpy import modsolvers
+
+
+class Trace:
+    """
+    Record of a run of the basic algorithm, one entry per iteration.
+
+    Each entry is a dictionary with the iteration number, the time spent in
+    the solver and in the oracle, the number of rows in the problem, the
+    optimal value of the solve, the stopping quantity (the length of the
+    minimum member under the new density, raised to the power p), the
+    certified lower and upper bounds on the modulus so far and, with
+    `members`, the edge indices of the member(s) returned by the oracle.
+
+    A trace can be passed as the `callback` of a modulus function, and is
+    itself called with each entry. Without a callback, modulus functions
+    keep a trace without the members, whose size grows with the number of
+    edges times the number of iterations.
+
+    Parameters:
+    callback -- function to call with each entry as it is recorded,
+                defaults to `None`
+    members  -- whether to record the edge indices of the members,
+                defaults to `True`
+
+    """
+
+    def __init__(self, callback=None, members=True):
+        self.callback = callback
+        self.members = members
+        self.records = []
+        self.start = time.perf_counter()
+        self.wall_time = 0.
+
+    def __call__(self, record):
+        self.records.append(record)
+        self.wall_time = time.perf_counter() - self.start
+        if self.callback is not None:
+            self.callback(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def summary(self):
+        """
+        Return the iteration count and the total wall, oracle and solver times.
+        """
+        return {
+            "iterations": sum(1 for r in self.records if r["iteration"] > 0),
+            "wall_time": self.wall_time,
+            "oracle_time": sum(r["oracle_time"] for r in self.records),
+            "solve_time": sum(r["solve_time"] for r in self.records),
+        }
+
+    def to_json(self, path=None):
+        """
+        Return the summary and entries as a JSON string,
+        or write them to the file `path` if given.
+        """
+        text = json.dumps({"summary": self.summary(),
+                           "records": self.records})
+        if path is None:
+            return text
+        with open(path, "w") as out:
+            out.write(text)
+
+
+class Result(list):
+    """
+    List of the return values of a modulus function, which also carries
+    the trace of the run as its attribute `trace` and the certified lower
+    and upper bounds on the modulus as its attribute `bounds`.
+    """
+
+    def __init__(self, values, trace=None, bounds=None):
+        list.__init__(self, values)
+        self.trace = trace
+        self.bounds = bounds
+
+
+class MinimalSubfamily:
+    """
+    Growable store for the members of a (minimal) subfamily.
+
+    Each member is kept as a sparse list of edge indices and usage counts in
+    arrays that grow by doubling, so that appending is amortized O(|mem|).
+    Repeated members are detected by hashing and stored only once.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    capacity   -- initial number of nonzeros to allocate, defaults to 64
+
+    """
+
+    def __init__(self, edge_count, capacity=64):
+        self.edge_count = edge_count
+        self.indices = numpy.zeros(capacity, dtype=numpy.int64)
+        self.data = numpy.zeros(capacity)
+        self.indptr = [0]
+        # Column index of each member, keyed by its sparse encoding
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def append(self, z):
+        """
+        Append the member with usage vector `z` (of dimension |E(G)|)
+        unless it is already present, and return its position
+        and whether it is new.
+        """
+        z = numpy.asarray(z, dtype=float)
+        idx = numpy.flatnonzero(z)
+        val = z[idx]
+        key = idx.tobytes() + val.tobytes()
+        if key in self.keys:
+            return [self.keys[key], False]
+        start = self.indptr[-1]
+        stop = start + len(idx)
+        # Grow the storage by doubling
+        if stop > len(self.indices):
+            size = max(stop, 2 * len(self.indices))
+            self.indices = numpy.resize(self.indices, size)
+            self.data = numpy.resize(self.data, size)
+        self.indices[start:stop] = idx
+        self.data[start:stop] = val
+        self.indptr.append(stop)
+        self.keys[key] = len(self) - 1
+        return [len(self) - 1, True]
+
+    def member(self, i):
+        """
+        Return the edge indices of the `i`th member.
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def tocsr(self):
+        """
+        Return the members as a *scipy* CSR matrix of dimension
+        |subfamily|-by-|E(G)|.
+        """
+        nnz = self.indptr[-1]
+        return scipy.sparse.csr_matrix(
+            (self.data[:nnz], self.indices[:nnz], numpy.asarray(self.indptr)),
+            shape=(len(self), self.edge_count)
+        )
+
+
+class Session:
+    """
+    Rows of the density problem
+
+        minimize ||x||_p  subject to  x >= 0,  Z @ x >= 1,
+
+    where the rows of Z (indicators of family members) are added one at a
+    time by the basic algorithm. Subclasses implement `solve()` over the
+    active rows.
+
+    Repeated members are stored once. If `retire` is given, rows that have
+    been slack for that many consecutive solves are retired from the problem
+    and only reinstated when a later density violates them again.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    p          -- modulus parameter, defaults to 2
+    retire     -- number of slack solves after which a row is retired,
+                  defaults to `None` (never)
+    slack      -- slack above which a row counts as inactive
+    dual_tol   -- multiplier, relative to the largest one, up to which a row
+                  counts as carrying none (interior-point solvers leave tiny
+                  positive multipliers on slack rows)
+
+    """
+
+    def __init__(self, edge_count, p=2, retire=None, slack=1e-6,
+                 dual_tol=1e-6):
+        self.edge_count = edge_count
+        self.p = p
+        self.retire = retire
+        self.slack = slack
+        self.dual_tol = dual_tol
+        # Row storage: the minimal subfamily found so far
+        self.rows = MinimalSubfamily(edge_count)
+        # Whether each row is in the problem and for how long it has been slack
+        self.active = numpy.zeros(0, dtype=bool)
+        self.idle = numpy.zeros(0, dtype=int)
+        # Number of changes to the active rows
+        self.changes = 0
+        # Most recent solution
+        self.dens = numpy.zeros(edge_count)
+        self.lam = numpy.zeros(0)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, z):
+        """
+        Append the constraint `1 <= z @ x` unless it is already present,
+        reinstating it if it was retired, and return its row index.
+        """
+        row, new = self.rows.append(z)
+        if new:
+            self._extend(row, z)
+            self.changes += 1
+        elif not self.active[row]:
+            self.active[row] = True
+            self.idle[row] = 0
+            self.changes += 1
+        return row
+
+    def _extend(self, row, z):
+        # Bookkeeping for a new row
+        self.active = numpy.append(self.active, True)
+        self.idle = numpy.append(self.idle, 0)
+        self.lam = numpy.append(self.lam, 0.)
+
+    def update_pool(self, dens):
+        """
+        Retire the rows that have been slack under `retire` consecutive
+        densities and reinstate the retired rows that `dens` violates.
+        """
+        if self.retire is None:
+            return
+        slack = self.matrix() @ dens - 1
+        self.idle = numpy.where(slack > self.slack, self.idle + 1, 0)
+        # Rows carrying multipliers stay in the problem
+        carrying = self.lam > self.dual_tol * max(numpy.max(self.lam,
+                                                            initial=0), 0)
+        retired = self.active & (self.idle >= self.retire) & ~carrying
+        violated = ~self.active & (slack < -self.slack)
+        self.active[retired] = False
+        self.active[violated] = True
+        self.changes += numpy.count_nonzero(violated)
+
+    def matrix(self):
+        """
+        Return the accumulated rows as a *scipy* CSR matrix.
+        """
+        return self.rows.tocsr()
+
+
+class DensitySession(Session):
+    """
+    Persistent *cvxpy* session for the density problem.
+
+    The rows are kept as sparse edge-index lists and enter the problem as a
+    single stacked sparse constraint, so that the cost of setting up each
+    solve grows with the number of nonzeros rather than with one *cvxpy*
+    constraint object per row. Only this setup cost is reduced: the problem
+    is still rebuilt and compiled by *cvxpy* on every solve, and the previous
+    density is passed as a starting point, which only solvers that accept
+    one (such as SCS and OSQP) use; CVXOPT, CLARABEL and ECOS start from
+    scratch each time. Compiling the stacked problem takes about a tenth of
+    a CLARABEL solve on a 4900-edge grid, which is all that keeping a
+    compiled (DPP) problem could save, and the dense parameter block it
+    needs for new rows slows the solver down by as much.
+
+    With `cone`, the objective is the sum of p-th powers of the density,
+    each bounded by a native power cone, so that the size of the problem
+    does not depend on the rational approximation of p.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    p          -- modulus parameter, defaults to 2
+    solver     -- solver to use in `prob.solve()`
+    retire     -- see `Session`
+    cone       -- whether to use power cones, defaults to `None`
+                  (see `modsolvers.power_cone()`)
+
+    """
+
+    def __init__(self, edge_count, p=2, solver="CVXOPT", retire=None,
+                 cone=None):
+        import cvxpy
+        Session.__init__(self, edge_count, p=p, retire=retire)
+        self.solver = solver
+        if cone is None:
+            cone = modsolvers.power_cone(solver, p)
+        self.cone = cone
+        # Create a |E(G)|-by-1 *cvxpy* matrix variable type
+        self.x = cvxpy.Variable(edge_count)
+        if cone:
+            # Sum of p-th powers, with t >= x^p on each edge
+            self.t, self.pow_cons = _power_cone(self.x, p)
+            self.obj = cvxpy.Minimize(cvxpy.sum(self.t))
+        else:
+            # Calculate the p-norm of the edge count matrix
+            # Note: This is not the sum of p^th powers as in the original
+            # papers
+            self.pow_cons = []
+            self.obj = cvxpy.Minimize(cvxpy.pnorm(self.x, p))
+
+    def solve(self):
+        """
+        Solve the density problem over the active rows and return the
+        optimal value and the (nonnegative) density.
+        """
+        import cvxpy
+        Z = self.matrix()[self.active]
+        cons = [self.x >= 0, Z @ self.x >= 1]
+        prob = cvxpy.Problem(self.obj, cons + self.pow_cons)
+        # Starting point for the solvers that accept one
+        self.x.value = self.dens
+        if self.cone:
+            self.t.value = self.dens ** self.p
+        y = prob.solve(solver=self.solver, warm_start=True)
+        if self.cone:
+            y = max(y, 0) ** (1 / self.p)
+        # Overwrite negative density estimates to zero
+        self.dens = numpy.maximum(numpy.asarray(self.x.value), 0)
+        self.lam = numpy.zeros(len(self))
+        self.lam[self.active] = numpy.asarray(cons[1].dual_value).reshape(-1)
+        return y, self.dens
+
+
+def _power_cone(x, p):
+    # Variable t with t >= x^p elementwise for x >= 0, as the power cones
+    # t^(1/p) * 1^(1 - 1/p) >= |x|
+    import cvxpy
+    t = cvxpy.Variable(x.shape)
+    return t, [cvxpy.PowCone3D(t, numpy.ones(x.shape), x, 1 / p)]
+
+
+def open_session(edge_count, p=2, solver=None, retire=None):
+    """
+    Return a session for the density problem using the given solver:
+    an engine or engine name such as `"native"` (p = 2 only) or `"fista"`,
+    a *cvxpy* solver name, or `None` to select one by p and `edge_count`
+    (see `modsolvers`). See `Session` for `retire`.
+    """
+    solver = modsolvers.resolve(solver, p=p, size=edge_count)
+    if hasattr(solver, "open_session"):
+        return solver.open_session(edge_count, p=p, retire=retire)
+    return DensitySession(edge_count, p=p, solver=solver, retire=retire)
+
+
+def solve_mass(usage, p=2, solver=None):
+    """
+    Compute the modulus and the optimal probability mass function
+    using @Albin2016a Equation 2.9.
+
+    Parameters:
+    usage  -- objects-by-edges usage matrix of the (sub)family,
+              dense or *scipy* sparse
+    p      -- modulus parameter, defaults to 2
+    solver -- solver backend, see `open_session()`
+
+    """
+    solver = modsolvers.resolve(solver, p=p, size=usage.shape[1])
+    if hasattr(solver, "solve_mass"):
+        return solver.solve_mass(usage, p=p)
+    import cvxpy
+    # preliminary calculations
+    n_objects = usage.shape[0]
+    # CVX variables
+    lam = cvxpy.Variable(n_objects)
+    constraint_list = [lam >= 0]
+    # CVX optimization problem
+    if modsolvers.power_cone(solver, p):
+        # Dual exponent q = p / (p - 1) through power cones
+        s, cones = _power_cone(usage.T @ lam / p, p / (p - 1))
+        obj = cvxpy.Maximize(cvxpy.sum(lam) - (p - 1) * cvxpy.sum(s))
+        constraint_list += cones
+    else:
+        obj = cvxpy.Maximize(
+            cvxpy.sum(lam) - (p - 1) * cvxpy.sum(
+                cvxpy.power(
+                    usage.T @ lam / p,
+                    p / (p - 1)
+                )
+            )
+        )
+    prob = cvxpy.Problem(obj, constraint_list)
+    # p-modulus and optimal probability mass function
+    mod = prob.solve(solver)
+    mu = numpy.asarray(lam.value / sum(lam.value))
+    return([mod, mu])
+
+
+def dual_mass(session, p=2):
+    """
+    Recover the optimal probability mass function on the rows of a session
+    from the multipliers of its last solve, which are proportional to it,
+    and the modulus as the energy of the pmf (@Albin2016a).
+
+    Parameters:
+    session -- session after the basic algorithm has run
+    p       -- modulus parameter, defaults to 2
+
+    """
+    # Rows added after the last solve carry no mass
+    lam = numpy.zeros(len(session))
+    lam[:len(session.lam)] = numpy.maximum(session.lam, 0)
+    mu = lam / sum(lam)
+    # Expected edge usage and its q-energy, q being the dual exponent of p
+    eta = session.matrix().T @ mu
+    q = p / (p - 1)
+    mod = numpy.sum(eta ** q) ** (1 - p)
+    return([mod, mu])
+
+
+def session_mass(session, p=2, solver=None, pmf="solve"):
+    """
+    Compute the modulus and the optimal probability mass function
+    on the minimal subfamily accumulated by a session.
+
+    Parameters:
+    session -- session after the basic algorithm has run
+    p       -- modulus parameter, defaults to 2
+    solver  -- solver backend, see `open_session()`
+    pmf     -- `"solve"` to solve @Albin2016a Equation 2.9,
+               `"duals"` to recover the pmf from the multipliers instead,
+               `"check"` to do both and compare, defaults to `"solve"`
+
+    """
+    if pmf == "solve":
+        return solve_mass(session.matrix(), p=p, solver=solver)
+    if pmf not in ("duals", "check"):
+        raise ValueError("Unknown pmf mode: %s" % pmf)
+    mod, mu = dual_mass(session, p=p)
+    if pmf == "check":
+        Z = session.matrix()
+        mod_solve, mu_solve = solve_mass(Z, p=p, solver=solver)
+        if abs(mod - mod_solve) > 1e-7:
+            print("Warning: The dual and solved moduli differ by more than 1e-7")
+        # The optimal pmf need not be unique, but its edge usage is; compare
+        # relative to the largest usage, within what interior-point duals
+        # deliver
+        eta = Z.T @ mu
+        diff = numpy.max(abs(eta - Z.T @ mu_solve), initial=0)
+        if diff > 1e-3 * numpy.max(eta, initial=0):
+            print("Warning: The dual and solved pmfs differ in edge usage "
+                  "by more than 1e-3 relative")
+    return([mod, mu])
+
+
+def _record(trace, record, Z):
+    # Record an iteration, with the edge indices of the oracle result if
+    # the trace keeps them
+    if trace.members:
+        record["members"] = [numpy.flatnonzero(zi).tolist() for zi in Z]
+    trace(record)
+
+
+def _lower_bound(session, y, p):
+    # Certified lower bound on the modulus from the last solve
+    if p == 'inf':
+        return float(y)
+    if p == 1 or not numpy.sum(numpy.maximum(session.lam, 0)) > 0:
+        return float(y ** p) if p == 1 else 0.
+    return float(dual_mass(session, p=p)[0])
+
+
+def density_loop(edge_count, oracle, p=2, eps=1e-8, solver=None,
+                 retire=None, callback=None, seed=None, warm=None,
+                 rel_gap=None):
+    """
+    Run @Albin2014 Algorithm 1: alternately solve the density problem over
+    the members found so far and add a minimum member under the new density,
+    until the minimum member has length within `eps` of 1.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    oracle     -- function returning the indicator array of a minimum member
+                  of the family under a density (`None` for unit density),
+                  or a 2-dimensional array of several members in increasing
+                  order of length, all violated ones of which are added
+    p          -- modulus parameter, defaults to 2
+    eps        -- theoretical error, defaults to 1e-8
+    solver     -- solver backend, see `open_session()`
+    retire     -- number of slack solves after which a member is retired
+                  from the problem, defaults to `None` (never)
+    callback   -- function to call with the `Trace` entry of each iteration,
+                  defaults to `None`
+    seed       -- members to start from, such as the minimal subfamily of an
+                  earlier run on the same graph, as a members-by-|E(G)| array
+                  or *scipy* sparse matrix, defaults to `None`
+    warm       -- density to warm-start the first solve from, used by the
+                  first-order engine and the *cvxpy* solvers that accept a
+                  starting point, defaults to `None`
+    rel_gap    -- relative gap between the certified bounds on the modulus
+                  at which to stop as well, defaults to `None` (never)
+
+    For 1 < p < inf, the multipliers of each solve, normalized to a pmf,
+    give a lower bound on the modulus by weak duality (see `dual_mass()`),
+    however inexact the solve; for p = 1 and p = inf the optimal value of
+    the solve is used instead. The density of each solve, scaled by the
+    length of the minimum member, is admissible for the whole family, so
+    that its energy is an upper bound.
+
+    Returns the optimal value of the last solve, the extremal density estimate
+    and the session holding the accumulated members, whose attribute `trace`
+    holds the `Trace` of the run and attribute `bounds` the best lower and
+    upper bounds on the modulus. When the run stops on `rel_gap`, the density
+    returned is instead the admissible density of the upper bound, and the
+    value its p-norm (its maximum for p = inf).
+
+    """
+    # Exponent used in the stopping criterion
+    if p == 'inf':
+        exp = 1
+    else:
+        exp = p
+    session = open_session(edge_count, p=p, solver=solver, retire=retire)
+    if warm is not None:
+        session.dens = numpy.asarray(warm, dtype=float)
+    if isinstance(callback, Trace):
+        trace = callback
+    else:
+        trace = Trace(callback, members=callback is not None)
+    session.trace = trace
+    if not len(trace):
+        trace.start = time.perf_counter()
+    # Store the minimum member(s) under unit density
+    start = time.perf_counter()
+    Z = numpy.atleast_2d(oracle(None))
+    oracle_time = time.perf_counter() - start
+    z = Z[0]
+    for zi in Z:
+        session.add(zi)
+    # Start from the seed members
+    if seed is not None:
+        seed = scipy.sparse.csr_matrix(seed)
+        for i in range(seed.shape[0]):
+            session.add(seed[i].toarray().ravel())
+    lower, upper = 0., numpy.inf
+    session.bounds = [lower, upper]
+    _record(trace, {"iteration": 0, "solve_time": 0.,
+                    "oracle_time": oracle_time,
+                    "constraints": int(numpy.count_nonzero(session.active)),
+                    "value": 0., "length": 0., "lower": lower,
+                    "upper": upper}, Z)
+    # Initialize the extremal density estimate
+    dens = numpy.zeros(edge_count)
+    best = None
+    y = 0
+    iteration = 0
+    # While the extremal length estimate is not within the error tolerance of 1
+    while (numpy.dot(z, dens) ** exp < 1 - eps):
+        # Solve the optimization problem
+        iteration += 1
+        start = time.perf_counter()
+        y, dens = session.solve()
+        solve_time = time.perf_counter() - start
+        changes = session.changes
+        constraints = int(numpy.count_nonzero(session.active))
+        # Retire long inactive rows and reinstate violated ones
+        session.update_pool(dens)
+        # Calculate the minimum member(s) under the new density estimate
+        start = time.perf_counter()
+        Z = numpy.atleast_2d(oracle(dens))
+        oracle_time = time.perf_counter() - start
+        z = Z[0]
+        # Certified bounds: the dual of the restricted problem from below,
+        # the density scaled by the length of the minimum member from above
+        length = numpy.dot(z, dens)
+        if length > 0:
+            admissible = dens / length
+            if p == 'inf':
+                energy = numpy.max(admissible, initial=0)
+            else:
+                energy = numpy.sum(admissible ** p)
+            if energy < upper:
+                upper, best = float(energy), admissible
+        lower = max(lower, _lower_bound(session, y, p))
+        # Rounding aside, the bounds cannot cross
+        lower = min(lower, upper)
+        session.bounds = [lower, upper]
+        _record(trace, {"iteration": iteration, "solve_time": solve_time,
+                        "oracle_time": oracle_time,
+                        "constraints": constraints, "value": float(y),
+                        "length": float(length ** exp),
+                        "lower": lower, "upper": upper}, Z)
+        if rel_gap is not None and upper < numpy.inf and \
+                upper - lower <= rel_gap * upper:
+            y, dens = upper ** (1 / exp), best
+            break
+        # Augment the constraints with the violated members, unless they are
+        # already among them, in which case the density is optimal up to the
+        # solver's accuracy
+        for zi in Z:
+            if numpy.dot(zi, dens) ** exp < 1 - eps:
+                session.add(zi)
+        if session.changes == changes:
+            break
+    return [y, dens, session]
+
+
+def edit_graph(graph, add=(), remove=()):
+    """
+    Return a copy of a graph with edges removed and added, and the array
+    mapping each edge index of `graph` to its index in the copy
+    (-1 for removed edges). *igraph* keeps the order of the remaining edges
+    and appends the added ones.
+
+    Parameters:
+    graph  -- *igraph* object
+    add    -- pairs of nodes to join by new edges, defaults to none
+    remove -- indices of the edges of `graph` to remove, defaults to none
+
+    """
+    edited = graph.copy()
+    remove = numpy.unique(numpy.asarray(remove, dtype=int))
+    edited.delete_edges(remove.tolist())
+    edited.add_edges(list(add))
+    kept = numpy.ones(graph.ecount(), dtype=bool)
+    kept[remove] = False
+    mapping = numpy.where(kept, numpy.cumsum(kept) - 1, -1)
+    return [edited, mapping]
+
+
+def remap_members(rho, Gamma, mapping, edge_count):
+    """
+    Carry a density and a minimal subfamily over to an edited graph:
+    members using a removed edge are dropped, the others are re-indexed, and
+    added edges get zero density.
+
+    Parameters:
+    rho        -- extremal density on the original graph
+    Gamma      -- minimal subfamily as an |E(G)|-by-|Gamma| matrix
+    mapping    -- edge index mapping returned by `edit_graph()`
+    edge_count -- number of edges of the edited graph
+
+    Returns the density and the members-by-|E| matrix of the surviving
+    members on the edited graph.
+
+    """
+    kept = mapping >= 0
+    warm = numpy.zeros(edge_count)
+    warm[mapping[kept]] = numpy.asarray(rho)[kept]
+    members = scipy.sparse.csr_matrix(Gamma).T.tocsr()
+    # Members that use a removed edge are no longer members
+    valid = numpy.asarray(members[:, ~kept].sum(axis=1)).ravel() == 0
+    members = members[valid][:, kept].tocoo()
+    seed = scipy.sparse.csr_matrix(
+        (members.data, (members.row, mapping[kept][members.col])),
+        shape=(members.shape[0], edge_count)
+    )
+    return [warm, seed]
+
+
+def density_path(edge_count, oracle, ps, eps=1e-8, solver=None,
+                 retire=None, callback=None, rel_gap=None):
+    """
+    Run the basic algorithm for each modulus parameter in a grid, starting
+    each run from the members accumulated by the previous one and from the
+    previous density (see `warm` in `density_loop()`).
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    oracle     -- see `density_loop()`
+    ps         -- sequence of modulus parameters
+    eps        -- theoretical error, defaults to 1e-8
+    solver     -- solver backend, see `open_session()`
+    retire     -- see `density_loop()`
+    callback   -- function to call with the `Trace` entry of each iteration
+                  of each run, defaults to `None`
+    rel_gap    -- see `density_loop()`
+
+    Returns the array of moduli and the |ps|-by-|E(G)| array of extremal
+    densities, with the list of the traces of the runs as the attribute
+    `traces` and the |ps|-by-2 array of the lower and upper bounds on the
+    moduli as the attribute `bounds`.
+
+    """
+    mods = numpy.zeros(len(ps))
+    rhos = numpy.zeros((len(ps), edge_count))
+    bounds = numpy.zeros((len(ps), 2))
+    traces = []
+    seed = None
+    warm = None
+    for i, p in enumerate(ps):
+        y, dens, session = density_loop(edge_count, oracle, p=p, eps=eps,
+                                        solver=solver, retire=retire,
+                                        callback=callback, seed=seed,
+                                        warm=warm, rel_gap=rel_gap)
+        mods[i] = y if p == 'inf' else y ** p
+        rhos[i] = dens
+        bounds[i] = session.bounds
+        traces.append(session.trace)
+        # Carry the minimal subfamily and the density forward
+        seed = session.matrix()
+        warm = dens
+    result = Result([mods, rhos], bounds=bounds)
+    result.traces = traces
+    return result
@@ -0,0 +1,189 @@
+"""
+Matrix-free first-order engine for the modulus problems.
+
+The density problem
+
+    minimize sum(x^p)  subject to  x >= 0,  Z @ x >= 1
+
+has the dual (@Albin2016a Equation 2.9)
+
+    maximize sum(lam) - (p - 1) * sum((Z' lam / p)^q)  subject to  lam >= 0,
+
+where q = p / (p - 1) is the dual exponent of p. The gradient of the dual
+objective is 1 - Z @ rho with rho = (Z' lam / p)^(q - 1), which is the
+extremal density at the optimum, so each step costs a few sparse mat-vecs
+with the members. The dual is maximized by FISTA with backtracking and
+adaptive restarts, until the gap to the primal value of the rescaled
+density `rho / min(Z @ rho)` is within a relative tolerance.
+"""
+
+import numpy
+import scipy.sparse
+
+from pmodpy import modcore
+
+
+def _check(p):
+    if p == 'inf' or p <= 1:
+        raise ValueError("The first-order engine requires 1 < p < inf")
+
+
+def _density(Z, lam, p):
+    # Density and edge usage associated with the multipliers (clipped at zero
+    # for the extrapolated points, which may leave the nonnegative orthant)
+    q = p / (p - 1)
+    eta = numpy.maximum(Z.T @ lam / p, 0)
+    return eta ** (q - 1), eta
+
+
+def _dual(lam, eta, p):
+    # Dual objective value
+    q = p / (p - 1)
+    return numpy.sum(lam) - (p - 1) * numpy.sum(eta ** q)
+
+
+def _primal(Z, rho, p):
+    # Feasible density obtained by rescaling `rho`, and its energy
+    lengths = Z @ rho
+    shortest = numpy.min(lengths) if len(lengths) else 1.
+    if shortest <= 0:
+        return rho, numpy.inf
+    dens = rho / shortest
+    return dens, numpy.sum(dens ** p)
+
+
+def maximize_dual(Z, p=2, lam=None, tol=1e-6, max_iter=10000):
+    """
+    Maximize the dual of the density problem over the rows of `Z`
+    by FISTA, and return the multipliers, the feasible density and
+    the lower and upper bounds on the p-modulus of the rows.
+
+    Parameters:
+    Z        -- members-by-edges *scipy* sparse matrix
+    p        -- modulus parameter, 1 < p < inf, defaults to 2
+    lam      -- multipliers to start from, defaults to zero
+    tol      -- relative duality gap at which to stop, defaults to 1e-6
+    max_iter -- maximum number of iterations, defaults to 10000
+
+    """
+    _check(p)
+    Z = scipy.sparse.csr_matrix(Z, dtype=float)
+    lam = numpy.zeros(Z.shape[0]) if lam is None else \
+        numpy.maximum(numpy.asarray(lam, dtype=float), 0)
+    rho, eta = _density(Z, lam, p)
+    value = _dual(lam, eta, p)
+    # Step size: 1 / L, with L adapted by backtracking
+    L = 1.
+    y, y_value, y_rho = lam, value, rho
+    t = 1.
+    lower, upper, dens = value, numpy.inf, rho
+    for _ in range(max_iter):
+        grad = 1 - Z @ y_rho
+        while True:
+            new = numpy.maximum(y + grad / L, 0)
+            step = new - y
+            new_rho, new_eta = _density(Z, new, p)
+            new_value = _dual(new, new_eta, p)
+            # Sufficient increase of the (concave) dual objective
+            if new_value >= y_value + numpy.dot(grad, step) - \
+                    L / 2 * numpy.dot(step, step) - 1e-15 * abs(y_value):
+                break
+            L *= 2
+        if new_value < value:
+            # Adaptive restart when the objective decreases
+            y, y_value, y_rho, t = lam, value, rho, 1.
+            L *= 2
+            continue
+        t_new = (1 + numpy.sqrt(1 + 4 * t ** 2)) / 2
+        y = new + (t - 1) / t_new * (new - lam)
+        lam, value, rho, t = new, new_value, new_rho, t_new
+        y_rho, y_eta = _density(Z, y, p)
+        y_value = _dual(y, y_eta, p)
+        L *= 0.9
+        # Duality gap with the rescaled density
+        lower = max(lower, value)
+        candidate, energy = _primal(Z, rho, p)
+        if energy < upper:
+            upper, dens = energy, candidate
+        if upper - lower <= tol * upper:
+            break
+    return [lam, dens, lower, upper]
+
+
+class FirstOrderSession(modcore.Session):
+    """
+    Session for the density problem solved by the first-order engine,
+    warm-started from the multipliers of the previous solve.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    p          -- modulus parameter, 1 < p < inf
+    tol        -- relative duality gap of each solve, defaults to 1e-6
+    max_iter   -- maximum number of iterations of each solve
+    retire     -- see `modcore.Session`
+
+    """
+
+    def __init__(self, edge_count, p=2, tol=1e-6, max_iter=10000,
+                 retire=None):
+        _check(p)
+        modcore.Session.__init__(self, edge_count, p=p, retire=retire)
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def solve(self):
+        """
+        Solve the density problem over the active rows to the session's
+        accuracy and return the p-norm and the (feasible) density.
+        """
+        Z = self.matrix()[self.active]
+        lam, dens, _, _ = maximize_dual(
+            Z, p=self.p, lam=self.lam[self.active], tol=self.tol,
+            max_iter=self.max_iter
+        )
+        self.lam = numpy.zeros(len(self))
+        self.lam[self.active] = lam
+        self.dens = dens
+        return numpy.sum(dens ** self.p) ** (1 / self.p), self.dens
+
+
+class FirstOrder:
+    """
+    Options of the first-order engine, to be passed as the `solver` of the
+    modulus functions (`"fista"` uses the defaults).
+
+    Parameters:
+    tol      -- relative duality gap of each solve, defaults to 1e-6
+    max_iter -- maximum number of iterations of each solve,
+                defaults to 10000
+
+    """
+
+    def __init__(self, tol=1e-6, max_iter=10000):
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def open_session(self, edge_count, p=2, retire=None):
+        return FirstOrderSession(edge_count, p=p, tol=self.tol,
+                                 max_iter=self.max_iter, retire=retire)
+
+    def solve_mass(self, usage, p=2):
+        return solve_mass(usage, p=p, tol=self.tol, max_iter=self.max_iter)
+
+
+def solve_mass(usage, p=2, tol=1e-6, max_iter=10000):
+    """
+    Compute the modulus and the optimal probability mass function
+    of a (sub)family with the first-order engine.
+
+    Parameters:
+    usage    -- objects-by-edges usage matrix of the (sub)family
+    p        -- modulus parameter, 1 < p < inf, defaults to 2
+    tol      -- relative duality gap at which to stop, defaults to 1e-6
+    max_iter -- maximum number of iterations, defaults to 10000
+
+    """
+    lam, _, lower, _ = maximize_dual(usage, p=p, tol=tol,
+                                     max_iter=max_iter)
+    mu = lam / numpy.sum(lam)
+    return([lower, mu])
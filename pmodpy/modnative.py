@@ -0,0 +1,208 @@
+"""
+Native *numpy* engine for the 2-modulus density problem.
+
+For p = 2 the density problem
+
+    minimize ||x||_2  subject to  x >= 0,  Z @ x >= 1
+
+has the dual
+
+    minimize 1/2 lam' G lam - sum(lam)  subject to  lam >= 0,
+
+where G = Z Z' is the Gram matrix of the members, and x = Z' lam is
+nonnegative since Z is. The dual is solved by a Lawson--Hanson active-set
+method that keeps the Cholesky factor of G restricted to the passive set.
+"""
+
+import numpy
+import scipy.linalg
+import scipy.sparse
+
+from pmodpy import modcore
+
+
+class NativeSession(modcore.Session):
+    """
+    Active-set session for the 2-modulus density problem.
+
+    Each new member appends a row and column to the Gram matrix; the
+    multipliers and the factorization of the passive set carry over from the
+    previous solve, so that a solve after adding a violated member usually
+    costs a single triangular append, and a member leaving the passive set a
+    downdate by Givens rotations rather than a new factorization.
+
+    Parameters:
+    edge_count -- number of edges of the graph
+    p          -- modulus parameter, must be 2
+    tol        -- optimality tolerance on the constraint slacks
+    pivot      -- relative pivot below which a member is treated as
+                  linearly dependent on the passive members
+    retire     -- see `modcore.Session`
+
+    """
+
+    def __init__(self, edge_count, p=2, tol=1e-15, pivot=1e-10, retire=None):
+        if p != 2:
+            raise ValueError("The native engine only supports p = 2")
+        modcore.Session.__init__(self, edge_count, p=p, retire=retire)
+        self.tol = tol
+        self.pivot = pivot
+        # Gram matrix with room to grow, and its columns of the passive
+        # members in passive order, so that the slacks need no gather
+        self.gram = numpy.zeros((16, 16))
+        self.cols = numpy.zeros((16, 16))
+        # Passive set and Cholesky factor of its Gram matrix, with room to
+        # grow
+        self.passive = []
+        self.chol = numpy.zeros((16, 16))
+
+    def _extend(self, row, z):
+        # Grow the Gram matrix by doubling
+        modcore.Session._extend(self, row, z)
+        k = row
+        if k + 1 > self.gram.shape[0]:
+            size = 2 * self.gram.shape[0]
+            for name in ["gram", "cols", "chol"]:
+                old = getattr(self, name)
+                new = numpy.zeros((size, size))
+                new[:k, :k] = old[:k, :k]
+                setattr(self, name, new)
+        g = self.matrix() @ numpy.asarray(z, dtype=float)
+        self.gram[k, :k + 1] = g
+        self.gram[:k + 1, k] = g
+        self.cols[k, :len(self.passive)] = g[self.passive]
+
+    def _append(self, j):
+        # Extend the Cholesky factor by row and column `j`, or return the
+        # coefficients of `z_j` in the passive members if it depends on them
+        G = self.gram
+        m = len(self.passive)
+        L = self.chol
+        if m == 0:
+            L[0, 0] = numpy.sqrt(G[j, j])
+        else:
+            l = scipy.linalg.solve_triangular(L[:m, :m], G[self.passive, j],
+                                              lower=True)
+            d = G[j, j] - numpy.dot(l, l)
+            if d <= self.pivot * G[j, j]:
+                return scipy.linalg.solve_triangular(L[:m, :m].T, l,
+                                                     lower=False)
+            L[m, :m] = l
+            L[m, m] = numpy.sqrt(d)
+        self.passive.append(j)
+        self.cols[:, m] = G[:, j]
+        return None
+
+    def _delete(self, i):
+        # Remove the `i`-th passive member and downdate the Cholesky factor:
+        # without row i the factor is lower Hessenberg from column i on, and
+        # Givens rotations of adjacent columns restore its triangle
+        m = len(self.passive)
+        L = self.chol
+        L[i:m - 1, :m] = L[i + 1:m, :m]
+        for k in range(i, m - 1):
+            a, b = L[k, k], L[k, k + 1]
+            r = numpy.hypot(a, b)
+            c, s = a / r, b / r
+            left, right = L[k:m - 1, k].copy(), L[k:m - 1, k + 1]
+            L[k:m - 1, k] = c * left + s * right
+            L[k:m - 1, k + 1] = c * right - s * left
+        L[m - 1, :m] = 0
+        L[:m, m - 1] = 0
+        self.cols[:, i:m - 1] = self.cols[:, i + 1:m]
+        del self.passive[i]
+
+    def _passive_solve(self):
+        # Minimize the dual over the passive set without sign constraints
+        m = len(self.passive)
+        return scipy.linalg.cho_solve((self.chol[:m, :m], True),
+                                      numpy.ones(m))
+
+    def solve(self):
+        """
+        Solve the density problem over the accumulated rows and return the
+        optimal value and the density.
+        """
+        k = len(self)
+        lam = self.lam
+        while True:
+            # Constraint slacks z @ x - 1 of the active members, to which
+            # only the passive members contribute
+            m = len(self.passive)
+            w = self.cols[:k, :m] @ lam[self.passive] - 1
+            w[self.passive] = numpy.inf
+            w[~self.active] = numpy.inf
+            j = int(numpy.argmin(w))
+            if w[j] >= -self.tol:
+                break
+            c = self._append(j)
+            if c is not None:
+                # Exchange `j` for a passive member along the direction that
+                # leaves the density unchanged
+                P = numpy.asarray(self.passive)
+                ratio = numpy.where(c > 0, lam[P] / numpy.where(c > 0, c, 1),
+                                    numpy.inf)
+                i = int(numpy.argmin(ratio))
+                lam[P] -= ratio[i] * c
+                lam[j] = ratio[i]
+                lam[P[i]] = 0
+                self._delete(i)
+                self._append(j)
+            while True:
+                s = self._passive_solve()
+                if numpy.all(s > 0):
+                    lam[self.passive] = s
+                    break
+                # Step back to the boundary and drop the members that hit it
+                P = numpy.asarray(self.passive)
+                old = lam[P]
+                neg = s <= 0
+                alpha = numpy.min(old[neg] / (old[neg] - s[neg]))
+                lam[P] = old + alpha * (s - old)
+                keep = lam[P] > 0
+                keep[numpy.argmin(numpy.where(neg, lam[P], numpy.inf))] = False
+                lam[P[~keep]] = 0
+                for i in numpy.flatnonzero(~keep)[::-1]:
+                    self._delete(i)
+        self.lam = lam
+        Z = self.matrix()
+        dens = Z.T @ lam
+        # Scale away rounding errors so that every active row holds
+        scale = min(1, numpy.min(Z[self.active] @ dens))
+        scale /= 1 + 8 * numpy.finfo(float).eps
+        self.dens = dens / scale
+        return numpy.sqrt(numpy.dot(self.dens, self.dens)), self.dens
+
+
+class Native:
+    """
+    The native engine, to be passed as the `solver` of the modulus functions
+    (as does `"native"`).
+    """
+
+    def open_session(self, edge_count, p=2, retire=None):
+        return NativeSession(edge_count, p=p, retire=retire)
+
+    def solve_mass(self, usage, p=2):
+        return solve_mass(usage, p=p)
+
+
+def solve_mass(usage, p=2):
+    """
+    Compute the 2-modulus and the optimal probability mass function
+    of a (sub)family with the native engine.
+
+    Parameters:
+    usage -- objects-by-edges usage matrix of the (sub)family
+    p     -- modulus parameter, must be 2
+
+    """
+    usage = scipy.sparse.csr_matrix(usage)
+    session = NativeSession(usage.shape[1], p=p)
+    for i in range(usage.shape[0]):
+        session.add(usage[i].toarray().ravel())
+    session.solve()
+    # At the optimum the modulus equals the total dual mass
+    mod = session.lam.sum()
+    mu = session.lam / mod
+    return([mod, mu])
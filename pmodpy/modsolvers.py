@@ -0,0 +1,123 @@
+"""
+Registry of the solver backends for the density and pmf problems.
+
+A backend is either the name of a *cvxpy* solver or an engine, an object with
+`open_session(edge_count, p, retire)` and `solve_mass(usage, p)` methods
+(see `modnative.Native` and `modfista.FirstOrder`). Nothing is imported until
+a backend is used, so that importing the modulus modules does not pay for
+*cvxpy*, and whether a *cvxpy* solver is installed is checked without
+importing it.
+"""
+
+import importlib
+import importlib.util
+
+
+# Python package behind each *cvxpy* solver
+CVXPY_SOLVERS = {
+    "CVXOPT": "cvxopt",
+    "CLARABEL": "clarabel",
+    "ECOS": "ecos",
+    "SCS": "scs",
+    "OSQP": "osqp",
+    "MOSEK": "mosek",
+}
+
+# Order in which installed *cvxpy* solvers are picked; OSQP only handles
+# quadratic programs, which the native engine solves anyway
+PREFERENCE = ["CVXOPT", "CLARABEL", "ECOS", "SCS"]
+
+# *cvxpy* solvers with native power cones, in order of preference for
+# non-integer p
+POWER_CONE = ["CLARABEL", "SCS", "MOSEK"]
+
+# Edge count from which the first-order engine is picked for 1 < p < inf
+LARGE = 100000
+
+# Engines by name, as (module, class) pairs loaded on first use
+ENGINES = {
+    "native": ("pmodpy.modnative", "Native"),
+    "fista": ("pmodpy.modfista", "FirstOrder"),
+}
+
+
+def register(name, module, attribute):
+    """
+    Register the engine class `attribute` of `module` under `name`.
+    """
+    ENGINES[name] = (module, attribute)
+
+
+def installed(name):
+    """
+    Return whether the backend `name` can be used; unknown names cannot.
+    """
+    if name in ENGINES:
+        return importlib.util.find_spec(ENGINES[name][0]) is not None
+    if importlib.util.find_spec("cvxpy") is None:
+        return False
+    package = CVXPY_SOLVERS.get(name)
+    return package is not None and \
+        importlib.util.find_spec(package) is not None
+
+
+def available():
+    """
+    Return the names of the usable backends.
+    """
+    return [name for name in list(ENGINES) + list(CVXPY_SOLVERS)
+            if installed(name)]
+
+
+def integral(p):
+    """
+    Return whether the modulus parameter `p` is a whole number (or `'inf'`),
+    which *cvxpy* expresses with a small number of second-order cones.
+    """
+    return p == 'inf' or float(p).is_integer()
+
+
+def power_cone(solver, p):
+    """
+    Return whether the powers of `p` are to be expressed with native power
+    cones for the *cvxpy* `solver`: rather than with second-order cones,
+    whose number grows with the digits of p, when p is not a whole number
+    and the solver supports them.
+    """
+    return solver in POWER_CONE and not integral(p)
+
+
+def select(p=2, size=0):
+    """
+    Return the name of the backend to use for modulus parameter `p` on a
+    graph with `size` edges: the native engine for p = 2, the first-order
+    engine for large graphs, the first installed solver of `POWER_CONE` for
+    other non-integer p, and otherwise the first installed *cvxpy* solver
+    of `PREFERENCE`.
+    """
+    if p == 2:
+        return "native"
+    finite = p != 'inf' and p > 1
+    if finite and size >= LARGE:
+        return "fista"
+    candidates = PREFERENCE if integral(p) else POWER_CONE + PREFERENCE
+    for name in candidates:
+        if installed(name):
+            return name
+    if finite:
+        return "fista"
+    raise ValueError("No installed solver handles p = %s" % p)
+
+
+def resolve(solver=None, p=2, size=0):
+    """
+    Return the backend for a `solver` argument: an engine object for engine
+    names and engines, or the *cvxpy* solver name. `None` or `"auto"` selects
+    one with `select()`.
+    """
+    if solver is None or solver == "auto":
+        solver = select(p=p, size=size)
+    if isinstance(solver, str) and solver in ENGINES:
+        module, attribute = ENGINES[solver]
+        return getattr(importlib.import_module(module), attribute)()
+    return solver
@@ -2,12 +2,17 @@
 Implementation for the modulus function for families of spanning subgraphs.
 """
 
+import heapq
+
 import numpy
-import cvxpy
+import scipy.sparse
+import scipy.sparse.csgraph
 import igraph
 
+from pmodpy import modcache, modcore
+
 
-def spantree(graph, dens):
+def spantree(graph, dens, k=None, seed=0):
     """
     Given a graph, return a *numpy* array of dimension |E(G)| indicating
     whether each edge is visited in a minimal spanning tree.
@@ -18,10 +23,28 @@ def spantree(graph, dens):
     Parameters:
     graph  -- *igraph* object
     dens   -- array of edge weights, defaults to `None`
+    k      -- if given, return a (up to) k-by-|E(G)| array indicating
+              the minimal spanning tree followed by the distinct minimal
+              spanning trees under up to k - 1 random perturbations of
+              `dens`, in increasing order of weight
+    seed   -- seed of the random perturbations
 
     Note: Weighted graphs are not supported yet.
 
     """
+    if k is not None:
+        weights = numpy.ones(graph.ecount()) if dens is None else dens
+        weights = numpy.asarray(weights, dtype=float)
+        # Relative perturbations of the weights
+        rng = numpy.random.default_rng(seed)
+        scale = 0.1 * (numpy.mean(weights) + 1e-12)
+        trees = [spantree(graph, dens)]
+        for j in range(k - 1):
+            noise = scale * rng.random(graph.ecount())
+            trees.append(spantree(graph, weights + noise))
+        z = numpy.unique(numpy.asarray(trees), axis=0)
+        # Sort by weight under the unperturbed density
+        return z[numpy.argsort(z @ weights, kind="stable")]
     # Find a minimal spanning tree
     st = graph.spanning_tree(weights=dens, return_tree=False)
     # Create a zero array of length |E(G)|
@@ -33,27 +56,160 @@ def spantree(graph, dens):
     return numpy.asarray(z)
 
 
+# Number of edges between components below which the spanning tree is
+# finished by Kruskal's algorithm rather than by vectorized Boruvka rounds
+KRUSKAL = 512
+
+
+class SpanningTreeOracle:
+    """
+    Stateful oracle for the minimal spanning trees of a graph under a
+    changing density, for use in place of `spantree()` across the
+    iterations of the basic algorithm.
+
+    The edges are kept as *numpy* arrays, in the order of the last density:
+    each new density is sorted starting from it, which the (stable) merge
+    sort does in near-linear time when the order has changed little, and
+    which breaks ties in favor of the last tree. The tree is then grown by
+    Boruvka rounds over the ranks in this order, each of which joins every
+    component to its lightest neighbor at once, with the components kept as
+    an array of labels, until few enough edges remain between components
+    for Kruskal's algorithm with an array-backed union-find forest. Since
+    the ranks are distinct, the tree is the one Kruskal's algorithm picks in
+    this order.
+
+    Parameters:
+    graph -- *igraph* object
+    k     -- if given, return (up to) k trees per call, see `spantree()`
+    seed  -- seed of the random perturbations, see `spantree()`
+
+    """
+
+    def __init__(self, graph, k=None, seed=0):
+        edges = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+        self.vcount = graph.vcount()
+        self.edge_count = len(edges)
+        self.tails = edges[:, 0]
+        self.heads = edges[:, 1]
+        self.k = k
+        self.rng = numpy.random.default_rng(seed)
+        # Edges in increasing order of the last density
+        self.order = numpy.arange(self.edge_count)
+
+    def _sort(self, weights):
+        # Edges in increasing order of `weights`, ties in the last order
+        return self.order[numpy.argsort(weights[self.order], kind="stable")]
+
+    def _grow(self, order):
+        # Minimal spanning forest for the edge ranks given by `order`
+        tails, heads = self.tails[order], self.heads[order]
+        # Component labels of the nodes, and the ranks of the edges between
+        # components
+        comp = numpy.arange(self.vcount)
+        count = self.vcount
+        live = numpy.flatnonzero(tails != heads)
+        chosen = numpy.zeros(self.edge_count, dtype=bool)
+        while len(live):
+            cu, cv = comp[tails[live]], comp[heads[live]]
+            if len(live) <= KRUSKAL:
+                # Finish with Kruskal's algorithm and a union-find forest
+                parent = list(range(count))
+                joined = 0
+                for e, u, v in zip(live.tolist(), cu.tolist(), cv.tolist()):
+                    while parent[u] != u:
+                        parent[u] = u = parent[parent[u]]
+                    while parent[v] != v:
+                        parent[v] = v = parent[parent[v]]
+                    if u != v:
+                        parent[u] = v
+                        chosen[e] = True
+                        joined += 1
+                        if joined == count - 1:
+                            break
+                break
+            # Lightest edge leaving each component
+            best = numpy.full(count, self.edge_count)
+            numpy.minimum.at(best, cu, live)
+            numpy.minimum.at(best, cv, live)
+            picked = best[best < self.edge_count]
+            chosen[picked] = True
+            # Merge the components joined by the picked edges
+            joins = scipy.sparse.coo_matrix(
+                (numpy.ones(len(picked)),
+                 (comp[tails[picked]], comp[heads[picked]])),
+                shape=(count, count)
+            )
+            count, labels = scipy.sparse.csgraph.connected_components(
+                joins, directed=False
+            )
+            comp = labels[comp]
+            live = live[comp[tails[live]] != comp[heads[live]]]
+        return numpy.sort(order[chosen])
+
+    def edges(self, dens=None):
+        """
+        Return the indices of the edges of a minimal spanning tree (forest)
+        under the density `dens` (unit density if `None`), in increasing
+        order.
+        """
+        if dens is None:
+            dens = numpy.ones(self.edge_count)
+        self.order = self._sort(numpy.asarray(dens, dtype=float))
+        return self._grow(self.order)
+
+    def __call__(self, dens=None):
+        """
+        Return a *numpy* array of dimension |E(G)| indicating whether each
+        edge is visited in a minimal spanning tree under `dens`, or a k-by-
+        |E(G)| array of trees, as `spantree()`.
+        """
+        z = numpy.zeros(self.edge_count)
+        z[self.edges(dens)] = 1
+        if self.k is None:
+            return z
+        weights = numpy.ones(self.edge_count) if dens is None else \
+            numpy.asarray(dens, dtype=float)
+        # Relative perturbations of the weights
+        scale = 0.1 * (numpy.mean(weights) + 1e-12)
+        trees = [z]
+        for j in range(self.k - 1):
+            noise = scale * self.rng.random(self.edge_count)
+            tree = numpy.zeros(self.edge_count)
+            tree[self._grow(self._sort(weights + noise))] = 1
+            trees.append(tree)
+        z = numpy.unique(numpy.asarray(trees), axis=0)
+        # Sort by weight under the unperturbed density
+        return z[numpy.argsort(z @ weights, kind="stable")]
+
+
 def modulus_spans_density(graph, p=2,
-                          eps=1e-8, solver=cvxpy.CVXOPT, verbose=0):
+                          eps=1e-8, solver=None, verbose=0, batch=1,
+                          retire=None, callback=None, cache=None,
+                          rel_gap=None):
+    # Return a cached result, or start from the trees of a near hit
+    # (see `modcache.ResultCache`)
+    seed = None
+    if cache is not None:
+        key, near = cache.key(graph, "spans", p=p, eps=eps, solver=solver,
+                              rel_gap=rel_gap)
+        entry = cache.get(key)
+        if entry is not None:
+            return modcore.Result([entry["mod"], entry["rho"]])
+        previous = cache.near(near)
+        if previous is not None:
+            seed = previous["Gamma"].T
     edge_count = graph.ecount()
     edge_list = graph.get_edgelist()
-    x = cvxpy.Variable(edge_count)
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    z = spantree(graph=graph, dens=None)
-    dens = numpy.zeros(edge_count)
-    constraint_list = [x >= 0, 1 <= z @ x]
     if p == 'inf':
         exp = 1
     else:
         exp = p
-    while (numpy.dot(z, dens) ** exp < 1 - eps):
-        prob = cvxpy.Problem(obj, constraint_list)
-        y = prob.solve(solver, verbose)
-        dens = x.value
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        z = spantree(graph=graph, dens=dens)
-        constraint_list.append(1 <= z @ x)
+
+    oracle = SpanningTreeOracle(graph, k=None if batch == 1 else batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            seed=seed, rel_gap=rel_gap)
     rho = numpy.asarray(dens)
     if verbose != 0:
         print("Edge", "Density")
@@ -61,47 +217,404 @@ def modulus_spans_density(graph, p=2,
             print(edge_list[i], rho[i])
             print(p, "-modulus is approximately ", y ** exp)
             print("Theoretical error = ", eps)
-    return([y ** p, rho])
+    if cache is not None:
+        cache.put(key, near, modcache.session_entry(y ** p, rho, session, p))
+    return modcore.Result([y ** p, rho], trace=session.trace,
+                          bounds=session.bounds)
 
 
 def modulus_spans_full(graph, p=2,
-                       eps=1e-8, solver=cvxpy.CVXOPT, verbose=False):
+                       eps=1e-8, solver=None, verbose=False,
+                       pmf="solve", batch=1, retire=None, callback=None,
+                       rel_gap=None):
     edge_count = graph.ecount()
-    x = cvxpy.Variable(edge_count)
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    dens = numpy.zeros(edge_count)
-    z = spantree(graph=graph, dens=None)
-    Gamma = z
-    constraint_list = [x >= 0, 1 <= z @ x]
-    while (numpy.dot(z, dens) ** p < 1 - eps):
-        prob = cvxpy.Problem(obj, constraint_list)
-        y = prob.solve(solver, verbose)
-        dens = x.value
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        z = spantree(graph=graph, dens=dens)
-        Gamma = numpy.c_[Gamma, z]
-        constraint_list.append(1 <= z @ x)
+
+    oracle = SpanningTreeOracle(graph, k=None if batch == 1 else batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            rel_gap=rel_gap)
+    # Minimal subfamily as a sparse |E(G)|-by-|Gamma| matrix
+    Gamma = session.rows.tocsr().T
     mod1 = y ** p
     rho = numpy.asarray(dens)
 
-    n_objects = Gamma.shape[1]
-    lam = cvxpy.Variable(n_objects)
-    constraint_list = [lam >= 0]
-    obj = cvxpy.Maximize(
-        cvxpy.sum(lam) - (p - 1) * cvxpy.sum(
-            cvxpy.power(
-                Gamma @ lam / p,
-                p / (p - 1)
-            )
-        )
-    )
-    prob = cvxpy.Problem(obj, constraint_list)
-    mod2 = prob.solve(solver, verbose)
-    mu = numpy.asarray(lam.value / sum(lam.value))
+    # Optimal pmf on the minimal subfamily
+    mod2, mu = modcore.session_mass(session, p=p, solver=solver, pmf=pmf)
 
     diff = abs(mod1-mod2)
     if diff > 1e-7:
         print("Warning: The modulus estimates differ by more than 1e-7")
 
-    return([mod1, mod2, rho, mu, Gamma])
+    return modcore.Result([mod1, mod2, rho, mu, Gamma],
+                         trace=session.trace, bounds=session.bounds)
+
+
+def modulus_spans_path(graph, ps, eps=1e-8, solver=None, batch=1,
+                       retire=None, callback=None, rel_gap=None):
+    # Spanning tree modulus for each of a grid of values of p, each
+    # computation starting from the trees and the density of the previous one
+    # (see `modcore.density_path`)
+    oracle = SpanningTreeOracle(graph, k=None if batch == 1 else batch)
+    return modcore.density_path(graph.ecount(), oracle, ps, eps=eps,
+                                solver=solver, retire=retire,
+                                callback=callback, rel_gap=rel_gap)
+
+
+def modulus_spans_update(graph, rho, Gamma, add=(), remove=(), p=2,
+                         eps=1e-8, solver=None, batch=1, retire=None,
+                         callback=None, rel_gap=None):
+    # Spanning tree modulus after edges are added and removed, resuming from
+    # the previous density and the trees of the previous minimal subfamily
+    # that avoid the removed edges (see `modwalks.modulus_walks_update`)
+    edited, mapping = modcore.edit_graph(graph, add=add, remove=remove)
+    edge_count = edited.ecount()
+    warm, seed = modcore.remap_members(rho, Gamma, mapping, edge_count)
+
+    oracle = SpanningTreeOracle(edited, k=None if batch == 1 else batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            seed=seed, warm=warm,
+                                            rel_gap=rel_gap)
+    Gamma = session.rows.tocsr().T
+    return modcore.Result([y ** p, numpy.asarray(dens), Gamma, edited],
+                          trace=session.trace, bounds=session.bounds)
+
+
+def _adjacency(vcount, heads, tails, counts):
+    # CSR adjacency lists of a multigraph given by its edge multiplicities
+    ends = numpy.concatenate([heads, tails])
+    nbrs = numpy.concatenate([tails, heads])
+    wts = numpy.concatenate([counts, counts])
+    order = numpy.argsort(ends, kind="stable")
+    indptr = numpy.concatenate([[0], numpy.cumsum(
+        numpy.bincount(ends, minlength=vcount))])
+    return indptr, nbrs[order], wts[order]
+
+
+def _peel(vcount, adjacency):
+    # Greedily remove a vertex of least degree and return the best
+    # edge-to-rank ratio |E(S)| / (|S| - 1) of the remaining sets, as a pair
+    # of integers, and the set
+    indptr, nbrs, wts = adjacency
+    deg = numpy.add.reduceat(wts, indptr[:-1]) if len(wts) else \
+        numpy.zeros(vcount, dtype=int)
+    deg[indptr[:-1] == indptr[1:]] = 0
+    heap = [(d, u) for u, d in enumerate(deg)]
+    heapq.heapify(heap)
+    alive = numpy.ones(vcount, dtype=bool)
+    edges = int(numpy.sum(wts)) // 2
+    best, best_size, order = (edges, vcount - 1), vcount, []
+    while len(order) < vcount - 2:
+        d, u = heapq.heappop(heap)
+        if not alive[u] or d != deg[u]:
+            continue
+        alive[u] = False
+        order.append(u)
+        edges -= int(deg[u])
+        for w, c in zip(nbrs[indptr[u]:indptr[u + 1]],
+                        wts[indptr[u]:indptr[u + 1]]):
+            if alive[w]:
+                deg[w] -= c
+                heapq.heappush(heap, (deg[w], w))
+        size = vcount - len(order)
+        if edges * best[1] > best[0] * (size - 1):
+            best, best_size = (edges, size - 1), size
+    core = numpy.ones(vcount, dtype=bool)
+    core[order[:vcount - best_size]] = False
+    return best, numpy.flatnonzero(core)
+
+
+def _best_component(S, heads, tails, counts):
+    # Connected component of the subgraph induced by `S` with the largest
+    # edge-to-rank ratio, as a pair of integers, and the component
+    inside = numpy.isin(heads, S) & numpy.isin(tails, S)
+    local = numpy.full(max(numpy.max(heads), numpy.max(tails)) + 1, -1)
+    local[S] = numpy.arange(len(S))
+    sub = igraph.Graph(len(S), numpy.column_stack(
+        [local[heads[inside]], local[tails[inside]]]).tolist())
+    membership = numpy.asarray(sub.components().membership)
+    edges = numpy.bincount(membership[local[heads[inside]]],
+                           weights=counts[inside],
+                           minlength=membership.max() + 1)
+    sizes = numpy.bincount(membership)
+    best, core = (0, 1), S[:1]
+    for comp in numpy.flatnonzero(sizes >= 2):
+        if edges[comp] * best[1] > best[0] * (sizes[comp] - 1):
+            best = (int(edges[comp]), int(sizes[comp] - 1))
+            core = S[membership == comp]
+    return best, core
+
+
+def _densest_core(vcount, heads, tails, counts):
+    # Subgraph of largest edge-to-rank ratio |E(S)| / (|S| - 1) of a
+    # connected multigraph, by Dinkelbach's method over one sweep of forced
+    # vertices on a single network: a fractional orientation of the edges
+    # with in-degree at most `theta` at every vertex, set up with one maximum
+    # flow and kept from one vertex to the next. A vertex `v` is in no set of
+    # ratio above `theta` as soon as its in-degree can be pushed out, along
+    # augmenting paths, to vertices with room to spare; otherwise the
+    # vertices the search reached form such a set. Once no set containing
+    # `v` beats the current ratio, none will beat a larger one, so `v` is
+    # deleted for the rest of the sweep, which only frees room at its
+    # neighbours. Every vertex of a set of ratio above `theta` has degree
+    # above `theta` within it, so vertices whose degree among the remaining
+    # ones drops to `theta` are deleted too. Amounts are integers in units
+    # of one over the denominator of `theta`, so that all comparisons are
+    # exact; *igraph* flows carry them exactly in doubles below 2**53.
+    if vcount == 2:
+        return (int(numpy.sum(counts)), 1), numpy.arange(2)
+    theta, core = _peel(vcount, _adjacency(vcount, heads, tails, counts))
+    theta, core = _best_component(core, heads, tails, counts)
+    # Adjacency lists of half-edges: half-edge 2e of edge e points at its
+    # head and 2e + 1 at its tail, and `load` holds the amount of e oriented
+    # into the vertex a half-edge points at
+    m = len(heads)
+    ends = numpy.concatenate([heads, tails])
+    order = numpy.argsort(ends, kind="stable")
+    indptr = numpy.concatenate([[0], numpy.cumsum(
+        numpy.bincount(ends, minlength=vcount))]).tolist()
+    halves = numpy.concatenate([2 * numpy.arange(m) + 1,
+                                2 * numpy.arange(m)])[order].tolist()
+    nbrs = numpy.concatenate([tails, heads])[order].tolist()
+    owner = ends[order].tolist()
+    ends = numpy.column_stack([heads, tails]).ravel().tolist()
+    mult = [int(c) for c in counts]
+    deg = [0] * vcount
+    for e in range(m):
+        deg[ends[2 * e]] += mult[e]
+        deg[ends[2 * e + 1]] += mult[e]
+    alive = [True] * vcount
+    load = [0] * (2 * m)
+    indeg = [0] * vcount
+    state = {"theta": theta, "core": core}
+
+    def orient(scale):
+        # Rescale the orientation to units of 1 / `scale`, splitting the
+        # edges evenly the first time
+        old = state.get("scale")
+        for e in range(m):
+            amount = mult[e] * scale
+            head = amount // 2 if old is None else load[2 * e] * scale // old
+            load[2 * e], load[2 * e + 1] = head, amount - head
+        indeg[:] = [0] * vcount
+        for h in range(2 * m):
+            if alive[ends[h]] and alive[ends[h ^ 1]]:
+                indeg[ends[h]] += load[h]
+        state.update(scale=scale, limit=state["theta"][0])
+
+    def push(v, need):
+        # Push `need` units of the in-degree of `v` to vertices below the
+        # limit; return None, or the vertices reached if it cannot be done
+        limit = state["limit"]
+        while need > 0:
+            prev = {v: -1}
+            queue, found = [v], None
+            for u in queue:
+                for k in range(indptr[u], indptr[u + 1]):
+                    w = nbrs[k]
+                    # Reversing part of the edge moves in-degree from u to w
+                    if w in prev or not alive[w] or not load[halves[k] ^ 1]:
+                        continue
+                    prev[w] = k
+                    if indeg[w] < limit:
+                        found = w
+                        break
+                    queue.append(w)
+                if found is not None:
+                    break
+            if found is None:
+                return queue
+            amount, w = min(need, limit - indeg[found]), found
+            while w != v:
+                k = prev[w]
+                amount = min(amount, load[halves[k] ^ 1])
+                w = owner[k]
+            w = found
+            while w != v:
+                k = prev[w]
+                load[halves[k] ^ 1] -= amount
+                load[halves[k]] += amount
+                w = owner[k]
+            indeg[v] -= amount
+            indeg[found] += amount
+            need -= amount
+        return None
+
+    def settle():
+        # Bring every in-degree within the limit with one maximum flow from
+        # the vertices above it to the vertices below it; return None, or
+        # the source side of a minimum cut if it cannot be done
+        limit = state["limit"]
+        source, sink = vcount, vcount + 1
+        arcs, capacity, which = [], [], []
+        for k in range(2 * m):
+            u, w = owner[k], nbrs[k]
+            if alive[u] and alive[w] and load[halves[k] ^ 1]:
+                arcs.append((u, w))
+                capacity.append(load[halves[k] ^ 1])
+                which.append(k)
+        excess = 0
+        for u in range(vcount):
+            if alive[u] and indeg[u] > limit:
+                arcs.append((source, u))
+                capacity.append(indeg[u] - limit)
+                excess += indeg[u] - limit
+            elif alive[u] and indeg[u] < limit:
+                arcs.append((u, sink))
+                capacity.append(limit - indeg[u])
+        if not excess:
+            return None
+        flow = igraph.Graph(vcount + 2, arcs, directed=True).maxflow(
+            source, sink, capacity)
+        for i, f in enumerate(flow.flow):
+            f = int(round(f))
+            if not f:
+                continue
+            u, w = arcs[i]
+            if i < len(which):
+                load[halves[which[i]] ^ 1] -= f
+                load[halves[which[i]]] += f
+            if u == source:
+                indeg[w] -= f
+            elif w == sink:
+                indeg[u] += f
+        if int(round(flow.value)) == excess:
+            return None
+        return [u for u in flow.partition[0] if u < vcount and alive[u]]
+
+    def delete(queue):
+        # Delete vertices, and the vertices left with degree at most `theta`
+        num, den = state["theta"]
+        for u in queue:
+            alive[u] = False
+        while queue:
+            u = queue.pop()
+            for k in range(indptr[u], indptr[u + 1]):
+                w = nbrs[k]
+                if alive[w]:
+                    deg[w] -= mult[halves[k] // 2]
+                    indeg[w] -= load[halves[k]]
+                    if deg[w] * den <= num:
+                        alive[w] = False
+                        queue.append(w)
+
+    def improve(S):
+        # Take the best component of a set of ratio above `theta` found by a
+        # failed push or flow, which only adds room at every vertex, and
+        # bring the orientation back within the limit
+        while S is not None:
+            theta, core = _best_component(numpy.asarray(S), heads, tails,
+                                          counts)
+            num, den = theta
+            state.update(theta=theta, core=core)
+            delete([u for u in range(vcount)
+                    if alive[u] and deg[u] * den <= num])
+            orient(den)
+            S = settle()
+
+    delete([u for u in range(vcount) if deg[u] * theta[1] <= theta[0]])
+    orient(theta[1])
+    improve(settle())
+    for v in numpy.argsort(-numpy.asarray(deg), kind="stable").tolist():
+        while alive[v]:
+            S = push(v, indeg[v])
+            if S is None:
+                break
+            improve(S)
+        if alive[v]:
+            delete([v])
+    return state["theta"], state["core"]
+
+
+def fairest_usage(graph):
+    """
+    Compute the fairest edge usage of the spanning trees of a graph, i.e. the
+    expected edge usage of the random spanning trees that is least in the
+    2-norm, which determines the spanning tree modulus for every p > 1,
+    by deflation (@Albin2021 Section 5):
+    the subgraph H maximizing |E(H)| / (|V(H)| - 1) is a homogeneous core on
+    which every edge has usage (|V(H)| - 1) / |E(H)|; contracting it and
+    repeating yields the usage of all edges. Each biconnected block is
+    deflated separately, since spanning trees decompose into trees of the
+    blocks.
+
+    Parameters:
+    graph -- *igraph* object (for disconnected graphs, spanning forests)
+
+    Returns the array of edge usages and the core hierarchy, a list of the
+    ratios and edge indices of the cores in decreasing order of ratio.
+
+    Note: Finding each core costs one maximum flow computation per
+    improvement of its ratio, and otherwise augmenting path searches on a
+    single network, which the deletion of the vertices already cleared keeps
+    short.
+
+    """
+    edge_list = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    eta = numpy.zeros(graph.ecount())
+    cores = []
+    # Assign each edge to its biconnected block (loops are in no tree)
+    blocks = [numpy.asarray(b) for b in graph.biconnected_components()]
+    of_vertex = [[] for _ in range(graph.vcount())]
+    for i, block in enumerate(blocks):
+        for u in block:
+            of_vertex[u].append(i)
+    block_edges = [[] for _ in blocks]
+    for e, (u, w) in enumerate(edge_list):
+        if u != w:
+            common = set(of_vertex[u]).intersection(of_vertex[w])
+            block_edges[common.pop()].append(e)
+    for block, edges in zip(blocks, block_edges):
+        edges = numpy.asarray(edges, dtype=int)
+        local = numpy.full(graph.vcount(), -1)
+        local[block] = numpy.arange(len(block))
+        # Super vertex of each vertex of the block as cores are contracted
+        label = numpy.arange(len(block))
+        ends = local[edge_list[edges]]
+        remaining = numpy.arange(len(edges))
+        while len(remaining):
+            a = label[ends[remaining, 0]]
+            b = label[ends[remaining, 1]]
+            nodes, inv = numpy.unique(numpy.concatenate([a, b]),
+                                      return_inverse=True)
+            pairs = numpy.sort(inv.reshape(2, -1).T, axis=1)
+            pairs, pair_of, counts = numpy.unique(pairs, axis=0,
+                                                  return_inverse=True,
+                                                  return_counts=True)
+            theta, core = _densest_core(len(nodes), pairs[:, 0], pairs[:, 1],
+                                        counts)
+            in_core = numpy.zeros(len(nodes), dtype=bool)
+            in_core[core] = True
+            inside = in_core[pairs[pair_of.ravel(), 0]] & \
+                in_core[pairs[pair_of.ravel(), 1]]
+            eta[edges[remaining[inside]]] = theta[1] / theta[0]
+            cores.append([theta[0] / theta[1], edges[remaining[inside]]])
+            # Contract the core into one super vertex
+            label[numpy.isin(label, nodes[core])] = nodes[core[0]]
+            remaining = remaining[~inside]
+    cores.sort(key=lambda core: -core[0])
+    return([eta, cores])
+
+
+def modulus_spans_exact(graph, p=2):
+    """
+    Compute the spanning tree modulus of a graph exactly from the fairest
+    edge usage eta (see `fairest_usage()`), without a convex solver:
+    Mod_p = (sum eta^q)^(1 - p) and rho = eta^(q - 1) / sum eta^q,
+    where q = p / (p - 1).
+
+    Parameters:
+    graph -- *igraph* object
+    p     -- modulus parameter, greater than 1, defaults to 2
+
+    Returns the modulus, the extremal density and the core hierarchy.
+
+    """
+    if p == 'inf' or p <= 1:
+        raise ValueError("The exact spanning tree modulus requires 1 < p")
+    eta, cores = fairest_usage(graph)
+    q = p / (p - 1)
+    energy = numpy.sum(eta ** q)
+    return([energy ** (1 - p), eta ** (q - 1) / energy, cores])
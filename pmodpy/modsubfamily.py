@@ -3,11 +3,47 @@ Implementation for the modulus function for a general family of objects.
 """
 
 import numpy
-import cvxpy
+import scipy.sparse
 import igraph
 
+from pmodpy import modcore
 
-def get_minimum(graph, subfamily, dens=None):
+
+def subfamily_index(graph, subfamily):
+    """
+    Compile a family of objects (subgraphs) into a *scipy* CSR matrix
+    of dimension |family|-by-|E(G)| indicating
+    whether each edge is a member of each element of the family.
+
+    Parameters:
+    graph     -- *igraph* object
+    subfamily -- family of objects in (subgraphs of) `graph`,
+                 each given as a list of edge indices
+
+    """
+    # Already compiled
+    if scipy.sparse.issparse(subfamily):
+        return scipy.sparse.csr_matrix(subfamily)
+    # Concatenate the edge lists of all members
+    lengths = numpy.fromiter((len(mem) for mem in subfamily), dtype=int,
+                             count=len(subfamily))
+    indptr = numpy.concatenate([[0], numpy.cumsum(lengths)])
+    if indptr[-1]:
+        indices = numpy.concatenate([numpy.asarray(mem, dtype=int)
+                                     for mem in subfamily if len(mem)])
+    else:
+        indices = numpy.zeros(0, dtype=int)
+    index = scipy.sparse.csr_matrix(
+        (numpy.ones(len(indices)), indices, indptr),
+        shape=(len(subfamily), graph.ecount())
+    )
+    # Encode whether each edge is involved, not how often it is listed
+    index.sum_duplicates()
+    index.data[:] = 1
+    return index
+
+
+def get_minimum(graph, subfamily, dens=None, k=None):
     """
     Given a graph and a family of objects (subgraphs),
     return a *numpy* array of dimension |E(G)| indicating
@@ -15,33 +51,36 @@ def get_minimum(graph, subfamily, dens=None):
 
     Parameters:
     graph     -- *igraph* object
-    subfamily -- family of objects in (subgraphs of) `graph`
+    subfamily -- family of objects in (subgraphs of) `graph`,
+                 or its compiled `subfamily_index()`
     dens      -- array of edge weights, defaults to `None`
+    k         -- if given, return a k-by-|E(G)| array indicating
+                 the k smallest elements in increasing order of weight
 
     Note: Weighted graphs are not supported yet.
 
     """
+    # Compile the family unless it already is
+    index = subfamily_index(graph, subfamily)
     # Unit density if weights not provided
     if dens is None:
-        dens = [float(1)] * graph.ecount()
-    # Initialize minimum weight
-    min_wt = float("inf")
-    # Iterate over members of the family
-    for mem in subfamily:
-        # Calculate the weight of the member
-        wt = sum([dens[x] for x in mem])
-        # If the weight is less than the current minimum weight, update
-        if wt < min_wt:
-            min_wt = wt
-            min_mem = mem
-    # Encode the mimimum object by whether each edge is involved
-    z = [int(i in min_mem) for i in range(graph.ecount())]
-    # Return as a *numpy* array
-    return numpy.asarray(z)
+        dens = numpy.ones(graph.ecount())
+    # Calculate the weights of all members
+    wt = index @ numpy.asarray(dens, dtype=float)
+    if k is None:
+        # Encode the mimimum object by whether each edge is involved
+        return index[int(numpy.argmin(wt))].toarray().ravel().astype(int)
+    # Find the k smallest members, in order of weight
+    k = min(k, len(wt))
+    smallest = numpy.argpartition(wt, k - 1)[:k]
+    smallest = smallest[numpy.argsort(wt[smallest], kind="stable")]
+    return index[smallest].toarray().astype(int)
 
 
 def modulus_subfamily_density(graph, subfamily, p=2,
-                              eps=1e-8, solver=cvxpy.CVXOPT, verbose=False):
+                              eps=1e-8, solver=None, verbose=False,
+                              batch=1, retire=None, callback=None,
+                              rel_gap=None):
     """
     Compute the modulus of a family of objects of a graph.
 
@@ -50,12 +89,26 @@ def modulus_subfamily_density(graph, subfamily, p=2,
     subfamily -- family of objects in (subgraphs of) `graph`
     p         -- modulus parameter, defaults to 2
     eps       -- theoretical error, defaults to 2e-36
-    solver    -- solver to use in `prob.solve()`
+    solver    -- solver backend, defaults to `None` (automatic,
+                 see `modsolvers`)
     verbose   -- whether to print status messages, defaults to `False`
+    batch     -- number of minimum members to look for in each iteration,
+                 all violated ones of which are added, defaults to 1
+    retire    -- number of iterations after which members that stay
+                 inactive are dropped from the problem until violated again,
+                 defaults to `None` (never)
+    callback  -- function to call with the `modcore.Trace` entry of each
+                 iteration, defaults to `None`; the trace of the run is
+                 returned as the attribute `trace` of the result
+    rel_gap   -- relative gap between the certified lower and upper bounds
+                 on the modulus at which to stop as well, defaults to `None`;
+                 the bounds are returned as the attribute `bounds` of the
+                 result
 
     Note: Weighted graphs are not supported yet.
 
-    Warning: For high values of `p` the following error may obtain:
+    Warning: For high values of `p`, with *cvxpy* solvers that lack power
+    cones (see `modsolvers.POWER_CONE`), the following error may obtain:
     `ZeroDivisionError('Fraction(%s, 0)' % numerator)`
 
     """
@@ -63,33 +116,17 @@ def modulus_subfamily_density(graph, subfamily, p=2,
     # Store the edge count and edge list
     edge_count = graph.ecount()
     edge_list = graph.get_edgelist()
-    # Create a |E(G)|-by-1 *cvxpy* matrix variable type
-    x = cvxpy.Variable(edge_count)
     #
-    # Calculate the p-norm of the edge count matrix
-    # Note: This is not the sum of p^th powers as in the original papers
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    # Store the minimum family member under the given edge weights
-    z = get_minimum(graph, subfamily)
-    # Initialize the extremal density estimate
-    dens = numpy.zeros(edge_count)
-    # Initialize the constraints for the optimization problem
-    constraint_list = [x >= 0, 1 <= z @ x]
-    # While the extremal length estimate is not within the error tolerance of 1
-    while (numpy.dot(z, dens) ** p < 1 - eps):
-        # Set up the optimization problem
-        prob = cvxpy.Problem(obj, constraint_list)
-        # Solve the optimization problem
-        y = prob.solve(solver, verbose)
-        # Update the extremal density estimate
-        dens = x.value
-        # Overwrite negative density estimates to zero
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        # Calculate the minimum family member under the new density estimate
-        z = get_minimum(graph, subfamily, dens)
-        # Augment the constraints
-        constraint_list.append(1 <= z @ x)
+    # Run the basic algorithm with minimum family members as objects
+    index = subfamily_index(graph, subfamily)
+
+    def oracle(dens):
+        return get_minimum(graph, index, dens,
+                           k=None if batch == 1 else batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            rel_gap=rel_gap)
     #
     # Store the final extremal density estimate
     rho = numpy.asarray(dens)
@@ -101,89 +138,61 @@ def modulus_subfamily_density(graph, subfamily, p=2,
         print(p, "-modulus is approximately", y ** p)
         print("Theoretical error = ", eps)
     # Return the modulus estimate and the extremal density estimate
-    return([y ** p, rho])
+    return modcore.Result([y ** p, rho], trace=session.trace,
+                          bounds=session.bounds)
 
 
 # @Albin2016a, Equation 2.9
 # unweighted graphs
 def modulus_subfamily_mass(graph, subfamily, p=2,
-                           solver=cvxpy.CVXOPT, verbose=False):
-    # preliminary calculations
-    n_objects = len(subfamily)
-    usage = numpy.asmatrix(
-        [[int(i in j) for i in range(graph.ecount())] for j in subfamily]
-    )
-    # CVX variables
-    lam = cvxpy.Variable(n_objects)
-    constraint_list = [lam >= 0]
-    # CVX optimization problem
-    obj = cvxpy.Maximize(
-        cvxpy.sum(lam) - (p - 1) * cvxpy.sum(
-            cvxpy.power(
-                numpy.transpose(usage) @ lam / p,
-                p / (p - 1)
-            )
-        )
-    )
-    prob = cvxpy.Problem(obj, constraint_list)
+                           solver=None, verbose=False):
+    # preliminary calculations: sparse usage matrix of the family
+    usage = subfamily_index(graph, subfamily)
     # p-modulus and optimal probability mass function
-    mod = prob.solve(solver, verbose)
-    mu = lam.value / sum(lam.value)
-    return([mod, mu])
+    return modcore.solve_mass(usage, p=p, solver=solver)
 
 def modulus_subfamily_full(graph, subfamily, p=2,
-                           eps=2e-24, solver=cvxpy.CVXOPT, verbose=False):
+                           eps=2e-24, solver=None, verbose=False,
+                           pmf="solve", batch=1, retire=None, callback=None,
+                           rel_gap=None):
     # preliminary calculations
     edge_count = graph.ecount()
-    dens = numpy.zeros(edge_count)
-    # CVX variables
-    x = cvxpy.Variable(edge_count)
-    constraint_list = [x >= 0]
-    # CVX optimization problem
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    # find minimum configuration for uniform density
-    z = get_minimum(graph, subfamily)
-    Gamma = z
-    constraint_list.append(1 <= z @ x)
+    index = subfamily_index(graph, subfamily)
     # iteratively append lengths of members of Gamma to constraints
-    while (numpy.dot(z, dens) ** p < 1 - eps):
-        # iteration of optimization process
-        prob = cvxpy.Problem(obj, constraint_list)
-        y = prob.solve()
-        dens = x.value
-        # overwrite negative values
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        z = get_minimum(graph, subfamily, dens)
-        Gamma = numpy.c_[Gamma, z]
-        constraint_list.append(1 <= z @ x)
+    def oracle(dens):
+        return get_minimum(graph, index, dens,
+                           k=None if batch == 1 else batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            rel_gap=rel_gap)
     #
     # modulus and extremal density
     mod1 = y ** p
     rho = numpy.asarray(dens)
     #
-    # preliminary calculations
-    n_objects = Gamma.shape[1]
-    # CVX variables
-    lam = cvxpy.Variable(n_objects)
-    constraint_list = [lam >= 0]
-    # CVX optimization problem
-    obj = cvxpy.Maximize(
-        cvxpy.sum(lam) - (p - 1) * cvxpy.sum(
-            cvxpy.power(
-                Gamma @ lam / p,
-                p / (p - 1)
-            )
-        )
-    )
-    prob = cvxpy.Problem(obj, constraint_list)
-    # modulus and optimal probability mass function
-    mod2 = prob.solve(solver, verbose)
-    mu = numpy.asarray(lam.value / sum(lam.value))
+    # modulus and optimal probability mass function on the minimal subfamily
+    mod2, mu = modcore.session_mass(session, p=p, solver=solver, pmf=pmf)
     #
     # concordance between modulus calculations
     diff = abs(mod1-mod2)
     if diff > 1e-7:
         print("Warning: Moduli estimates differ by more than 1e-7")
     #
-    return([mod1, mod2, rho, mu])
+    return modcore.Result([mod1, mod2, rho, mu], trace=session.trace,
+                          bounds=session.bounds)
+
+
+def modulus_subfamily_path(graph, subfamily, ps, eps=1e-8,
+                           solver=None, batch=1, retire=None,
+                           callback=None, rel_gap=None):
+    # modulus of the family for each of a grid of values of p, each
+    # computation starting from the members and the density of the previous
+    # one (see `modcore.density_path`)
+    index = subfamily_index(graph, subfamily)
+    def oracle(dens):
+        return get_minimum(graph, index, dens,
+                           k=None if batch == 1 else batch)
+    return modcore.density_path(graph.ecount(), oracle, ps, eps=eps,
+                                solver=solver, retire=retire,
+                                callback=callback, rel_gap=rel_gap)
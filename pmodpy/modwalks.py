@@ -2,17 +2,24 @@
 Implementation for the modulus function for families of walks.
 """
 
+import concurrent.futures
+import itertools
+
 import numpy
-import cvxpy
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
 import igraph
 
+from pmodpy import modcache, modcore
+
 
-def shortest(graph, source, target, dens=None):
+def shortest(graph, source, target, dens=None, k=None):
     """
     Given a graph, return a *numpy* array of dimension |E(G)| indicating
     whether each edge is visited in a shortest path from source to target.
 
-    Uses `get_shortest_paths` from *python-igraph*:
+    Uses `get_shortest_paths` and `get_k_shortest_paths` from *python-igraph*:
     http://igraph.org/python/
 
     Parameters:
@@ -20,10 +27,21 @@ def shortest(graph, source, target, dens=None):
     source -- source node of `graph`
     target -- target node of `graph`
     dens   -- array of edge weights, defaults to `None`
+    k      -- if given, return a (up to) k-by-|E(G)| array indicating
+              the k shortest paths in increasing order of length
 
     Note: Weighted graphs are not supported yet.
 
     """
+    if k is not None:
+        # Find the k shortest paths
+        sps = graph.get_k_shortest_paths(source, to=target, k=k,
+                                         weights=dens, mode="OUT",
+                                         output="epath")
+        z = numpy.zeros((max(len(sps), 1), graph.ecount()))
+        for j, sp in enumerate(sps):
+            numpy.add.at(z[j], sp, 1)
+        return z
     # Find a shortest path
     sp = graph.get_shortest_paths(source, to=target, weights=dens,
                                   mode="OUT", output="epath")
@@ -36,8 +54,331 @@ def shortest(graph, source, target, dens=None):
     return numpy.asarray(z)
 
 
+class ShortestPathOracle:
+    """
+    Stateful oracle for the shortest paths from a source node to a target
+    node under a changing density, for use in place of `shortest()` across
+    the iterations of the basic algorithm.
+
+    The graph is compiled once into a *scipy* CSR matrix with one entry per
+    (ordered) pair of adjacent nodes, whose values are refreshed from each
+    density by the lightest of the parallel edges. The last path is kept with
+    the density it was found under: it is still shortest when the density has
+    not increased on it nor decreased anywhere else, in which case it is
+    returned without a search, and otherwise its new length bounds the
+    Dijkstra search from the source.
+
+    Parameters:
+    graph  -- *igraph* object
+    source -- source node of `graph`
+    target -- target node of `graph`
+
+    """
+
+    def __init__(self, graph, source, target):
+        edges = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+        self.edge_count = len(edges)
+        self.source = source
+        self.target = target
+        # Arcs (both orientations of undirected edges), loops aside
+        proper = edges[:, 0] != edges[:, 1]
+        tails, heads = edges[proper, 0], edges[proper, 1]
+        ids = numpy.flatnonzero(proper)
+        if not graph.is_directed():
+            tails, heads = (numpy.concatenate([tails, heads]),
+                            numpy.concatenate([heads, tails]))
+            ids = numpy.concatenate([ids, ids])
+        # Group the parallel arcs of each pair of nodes, pairs in CSR order
+        order = numpy.lexsort((heads, tails))
+        tails, heads, self.ids = tails[order], heads[order], ids[order]
+        first = numpy.ones(len(tails), dtype=bool)
+        first[1:] = (tails[1:] != tails[:-1]) | (heads[1:] != heads[:-1])
+        self.starts = numpy.flatnonzero(first)
+        self.stops = numpy.append(self.starts[1:], len(tails))
+        # Sorted keys of the pairs, tail * |V(G)| + head
+        self.keys = tails[self.starts] * graph.vcount() + heads[self.starts]
+        indptr = numpy.searchsorted(tails[self.starts],
+                                    numpy.arange(graph.vcount() + 1))
+        self.matrix = scipy.sparse.csr_matrix(
+            (numpy.ones(len(self.starts)), heads[self.starts], indptr),
+            shape=(graph.vcount(), graph.vcount())
+        )
+        # Last path and the density it is shortest under
+        self.dens = None
+        self.last = None
+
+    def edges(self, dens=None):
+        """
+        Return the indices of the edges of a shortest path from the source
+        to the target under the density `dens` (unit density if `None`),
+        in order, or an empty array if there is none.
+        """
+        if dens is None:
+            dens = numpy.ones(self.edge_count)
+        dens = numpy.asarray(dens, dtype=float)
+        limit = numpy.inf
+        if self.last is not None:
+            delta = dens - self.dens
+            on_path = numpy.zeros(self.edge_count, dtype=bool)
+            on_path[self.last] = True
+            if numpy.all(delta[on_path] <= 0) and \
+                    numpy.all(delta[~on_path] >= 0):
+                self.dens = dens
+                return self.last
+            # No shorter path is further away than the last one
+            limit = numpy.sum(dens[self.last]) * (1 + 1e-12) + 1e-300
+        if len(self.starts):
+            self.matrix.data = numpy.minimum.reduceat(dens[self.ids],
+                                                      self.starts)
+        dist, pred = scipy.sparse.csgraph.dijkstra(
+            self.matrix, indices=self.source, return_predecessors=True,
+            limit=limit
+        )
+        if numpy.isinf(dist[self.target]) and limit < numpy.inf:
+            dist, pred = scipy.sparse.csgraph.dijkstra(
+                self.matrix, indices=self.source, return_predecessors=True
+            )
+        nodes = [self.target]
+        if numpy.isfinite(dist[self.target]):
+            while nodes[-1] != self.source:
+                nodes.append(pred[nodes[-1]])
+        nodes = numpy.array(nodes[::-1], dtype=int)
+        # Pairs of consecutive nodes, and the lightest of their parallel arcs
+        pairs = self.keys.searchsorted(nodes[:-1] * self.matrix.shape[0] +
+                                       nodes[1:])
+        path = self.ids[self.starts[pairs]]
+        for j in numpy.flatnonzero(self.stops[pairs] - self.starts[pairs] > 1):
+            arcs = self.ids[self.starts[pairs[j]]:self.stops[pairs[j]]]
+            path[j] = arcs[numpy.argmin(dens[arcs])]
+        self.last = path
+        self.dens = dens
+        return self.last
+
+    def __call__(self, dens=None):
+        """
+        Return a *numpy* array of dimension |E(G)| indicating whether each
+        edge is visited in a shortest path under `dens`, as `shortest()`.
+        """
+        z = numpy.zeros(self.edge_count)
+        z[self.edges(dens)] = 1
+        return z
+
+
+def walk_oracle(graph, source, target, batch=1):
+    """
+    Return the oracle of the basic algorithm for the walks from a source
+    node to a target node: a `ShortestPathOracle` for single paths, and
+    `shortest()` for the `batch` shortest paths otherwise.
+    """
+    if batch == 1:
+        return ShortestPathOracle(graph, source, target)
+
+    def oracle(dens):
+        return shortest(graph=graph, source=source, target=target, dens=dens,
+                        k=batch)
+    return oracle
+
+
+def _relevant_edges(graph, source, target):
+    # Indices of the edges that lie on some simple path from source to target
+    # (a superset of them in directed graphs), loops aside
+    edges = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    keep = edges[:, 0] != edges[:, 1]
+    if graph.is_directed():
+        # Edges leaving a node reachable from the source, without going
+        # through the target, for a node that reaches the target
+        keep &= (edges[:, 1] != source) & (edges[:, 0] != target)
+        sub = graph.subgraph_edges(numpy.flatnonzero(keep),
+                                   delete_vertices=False)
+        reach = numpy.zeros(graph.vcount(), dtype=bool)
+        reach[sub.subcomponent(source, mode="OUT")] = True
+        coreach = numpy.zeros(graph.vcount(), dtype=bool)
+        coreach[sub.subcomponent(target, mode="IN")] = True
+        keep &= reach[edges[:, 0]] & coreach[edges[:, 1]]
+        return numpy.flatnonzero(keep)
+    # Undirected: the edges of the blocks on the path from the source to the
+    # target in the block-cut tree
+    blocks = [members for members, _, _ in _route(graph, source, target)]
+    if not blocks:
+        return numpy.zeros(0, dtype=int)
+    return numpy.sort(numpy.concatenate(blocks))
+
+
+def _route(graph, source, target):
+    # Blocks on the path from the source to the target in the block-cut tree
+    # of (the undirected graph underlying) `graph`, in order, as triples of
+    # the indices of their edges other than loops and the nodes through
+    # which walks enter and leave them; empty if the target is unreachable
+    edges = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    proper = edges[:, 0] != edges[:, 1]
+    blocks, cuts = graph.biconnected_components(
+        return_articulation_points=True
+    )
+    blocks = list(blocks)
+    cut_node = {v: len(blocks) + i for i, v in enumerate(cuts)}
+    tree = []
+    home = {}
+    for b, block in enumerate(blocks):
+        for v in block:
+            if v in cut_node:
+                tree.append((b, cut_node[v]))
+            else:
+                home[v] = b
+    for v in cut_node:
+        home[v] = cut_node[v]
+    if source not in home or target not in home or source == target:
+        return []
+    tree = igraph.Graph(n=len(blocks) + len(cuts), edges=tree)
+    path = tree.get_shortest_paths(home[source], to=home[target])[0]
+    if not path:
+        return []
+    node = {cut_node[v]: v for v in cut_node}
+    route = []
+    inside = numpy.zeros(graph.vcount(), dtype=bool)
+    for i, b in enumerate(path):
+        if b >= len(blocks):
+            continue
+        # An edge whose ends both lie in a block belongs to that block,
+        # since two blocks share at most one node
+        inside[:] = False
+        inside[blocks[b]] = True
+        members = numpy.flatnonzero(proper & inside[edges[:, 0]] &
+                                    inside[edges[:, 1]])
+        # Walks enter and leave through the neighboring cut nodes
+        enter = node[path[i - 1]] if i > 0 else source
+        leave = node[path[i + 1]] if i < len(path) - 1 else target
+        route.append((members, enter, leave))
+    return route
+
+
+def reduce_walks(graph, source, target, p=2):
+    """
+    Reduce a graph for the modulus of the walks from a source node to a
+    target node: remove the edges on no simple path between them (dangling
+    trees, blocks and components off the way, loops), then, for 1 < p < inf,
+    repeatedly merge parallel edges and contract chains through nodes of
+    degree 2 other than the source and the target.
+
+    Merged edges carry p-conductances `sigma`, which add up in parallel and
+    combine as (sum sigma_i^(-1/(p-1)))^-(p-1) in series, so that the
+    modulus of the walks of the weighted problem
+
+        minimize sum(sigma * rho^p)  subject to  rho >= 0,
+                                                 sum(rho on each walk) >= 1
+
+    on the reduced graph is that of `graph`. The extremal density of `graph`
+    is `expand @ rho` for the extremal density `rho` of the reduced graph:
+    parallel edges share the density of their merged edge, and the edges of
+    a chain split it in proportion to sigma_i^(-1/(p-1)).
+
+    Parameters:
+    graph  -- *igraph* object
+    source -- source node of `graph`
+    target -- target node of `graph`
+    p      -- modulus parameter, defaults to 2
+
+    Returns the reduced graph, its source and target nodes, the array of
+    p-conductances of its edges and the |E(G)|-by-|E(reduced)| *scipy*
+    sparse matrix `expand`.
+
+    """
+    directed = graph.is_directed()
+    edges = graph.get_edgelist()
+    merge = p != 'inf' and p > 1
+    # Working edges by id: ends, p-conductance and the (original edge,
+    # share of the density) pairs they stand for
+    ends, sigma, parts = {}, {}, {}
+    incident = {}
+    bundle = {}
+    queue = []
+    ids = itertools.count()
+
+    def pair(u, v):
+        return (u, v) if directed or u <= v else (v, u)
+
+    def detach(e):
+        u, v = ends.pop(e)
+        incident[u].discard(e)
+        incident[v].discard(e)
+        del bundle[pair(u, v)]
+        queue.extend([u, v])
+        return sigma.pop(e), parts.pop(e)
+
+    def attach(u, v, s, members):
+        key = pair(u, v)
+        if merge and key in bundle:
+            # Parallel edges: conductances add up, densities are shared
+            e = bundle[key]
+            sigma[e] += s
+            parts[e] += members
+            queue.extend([u, v])
+            return
+        e = next(ids)
+        ends[e] = (u, v)
+        sigma[e] = s
+        parts[e] = members
+        bundle.setdefault(key, e)
+        incident.setdefault(u, set()).add(e)
+        incident.setdefault(v, set()).add(e)
+
+    for i in _relevant_edges(graph, source, target):
+        u, v = edges[i]
+        attach(u, v, 1., [(i, 1.)])
+    if merge:
+        queue.extend(incident)
+        while queue:
+            v = queue.pop()
+            if v in (source, target) or len(incident.get(v, ())) != 2:
+                continue
+            e1, e2 = sorted(incident[v])
+            (a1, b1), (a2, b2) = ends[e1], ends[e2]
+            if directed:
+                # A chain needs one edge in and one edge out
+                if b1 == v and a2 == v:
+                    a, b = a1, b2
+                elif b2 == v and a1 == v:
+                    e1, e2 = e2, e1
+                    a, b = a2, b1
+                else:
+                    continue
+            else:
+                a = a1 if b1 == v else b1
+                b = b2 if a2 == v else a2
+            s1, m1 = detach(e1)
+            s2, m2 = detach(e2)
+            if a == b:
+                # A cycle through v hanging off a carries no path
+                continue
+            # Series edges: resistances sigma^(-1/(p-1)) add up
+            w1 = s1 ** (-1 / (p - 1))
+            w2 = s2 ** (-1 / (p - 1))
+            members = [(i, f * w1 / (w1 + w2)) for i, f in m1] + \
+                [(i, f * w2 / (w1 + w2)) for i, f in m2]
+            attach(a, b, (w1 + w2) ** -(p - 1), members)
+    # Number the remaining nodes, the source and the target first
+    order = sorted(ends)
+    nodes = {source: 0, target: 1}
+    for e in order:
+        for v in ends[e]:
+            nodes.setdefault(v, len(nodes))
+    reduced = igraph.Graph(n=len(nodes), directed=directed,
+                           edges=[(nodes[ends[e][0]], nodes[ends[e][1]])
+                                  for e in order])
+    rows, cols, data = [], [], []
+    for j, e in enumerate(order):
+        for i, f in parts[e]:
+            rows.append(i)
+            cols.append(j)
+            data.append(f)
+    expand = scipy.sparse.csr_matrix((data, (rows, cols)),
+                                     shape=(len(edges), len(order)))
+    return [reduced, 0, 1, numpy.array([sigma[e] for e in order]), expand]
+
+
 def modulus_walks_density(graph, source, target, p=2,
-                          eps=1e-8, solver=cvxpy.CVXOPT, verbose=False):
+                          eps=1e-8, solver=None, verbose=False,
+                          batch=1, retire=None, callback=None, cache=None,
+                          reduce=False, rel_gap=None):
     """
     Compute the modulus of the family of walks in a graph
     from a source node to a target node.
@@ -48,12 +389,33 @@ def modulus_walks_density(graph, source, target, p=2,
     source  -- source node of `graph`
     target  -- target node of `graph`
     eps     -- theoretical error, defaults to 2e-36
-    solver  -- solver to use in `prob.solve()`
+    solver  -- solver backend, defaults to `None` (automatic,
+               see `modsolvers`)
     verbose -- whether to print status messages, defaults to `False`
+    batch   -- number of shortest paths to look for in each iteration,
+               all violated ones of which are added, defaults to 1
+    retire  -- number of iterations after which paths that stay inactive
+               are dropped from the problem until violated again,
+               defaults to `None` (never)
+    callback -- function to call with the `modcore.Trace` entry of each
+               iteration, defaults to `None`; the trace of the run is
+               returned as the attribute `trace` of the result
+    cache   -- `modcache.ResultCache` to look the result up in and store it
+               in, defaults to `None`; a cached result is returned with no
+               trace, and a cached result with a different `eps` seeds the
+               computation with its minimal subfamily
+    reduce  -- whether to solve the problem on the graph reduced by
+               `reduce_walks()` and map the density back to the edges of
+               `graph`, defaults to `False`
+    rel_gap -- relative gap between the certified lower and upper bounds on
+               the modulus at which to stop as well, defaults to `None`
+               (stop on `eps` only); the bounds are returned as the
+               attribute `bounds` of the result
 
     Note: Weighted graphs are not supported yet.
 
-    Warning: For high values of `p`, the following error may obtain:
+    Warning: For high values of `p`, with *cvxpy* solvers that lack power
+    cones (see `modsolvers.POWER_CONE`), the following error may obtain:
     `ZeroDivisionError('Fraction(%s, 0)' % numerator)`
 
     """
@@ -64,43 +426,50 @@ def modulus_walks_density(graph, source, target, p=2,
 
     #scaled_weight_vector=numpy.power(weight_vector,1/p)
 
+    # Return a cached result, or start from the paths of a near hit
+    seed = None
+    if cache is not None:
+        key, near = cache.key(graph, "walks", source=source, target=target,
+                              p=p, eps=eps, solver=solver,
+                              rel_gap=rel_gap)
+        entry = cache.get(key)
+        if entry is not None:
+            return modcore.Result([entry["mod"], entry["rho"]])
+        previous = cache.near(near)
+        if previous is not None and not reduce:
+            seed = previous["Gamma"].T
+
     # Store the edge count and edge list
     edge_count = graph.ecount()
     edge_list = graph.get_edgelist()
-    # Create a |E(G)|-by-1 *cvxpy* matrix variable type
-    x = cvxpy.Variable(edge_count)
-
-    # Calculate the p-norm of the edge count matrix
-    # Note: This is not the sum of p^th powers as in the original papers
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    # Store the shortest path under the given edge weights
-    z = shortest(graph=graph, source=source, target=target, dens=None)
-    # Initialize the extremal density estimate
-    dens = numpy.zeros(edge_count)
-    # Initialize the constraints for the optimization problem
-    constraint_list = [x >= 0, 1 <= z @ x]
-    # Define the appropriate stopping criterion
-    # if p == 'inf':x
-    # def stop_criterion(internal_z, internal_dens):
-    # numpy.dot(internal_z, internal_dens) >= 1
-    # else:
-    # def stop_criterion(internal_z, internal_dens):
-    # (numpy.dot(internal_z, internal_dens)) ** p >= 1 - eps
-    # While the extremal length estimate is not within the error tolerance of 1
-    while (numpy.dot(z, dens) ** p < 1 - eps):
-        # Set up the optimization problem
-        prob = cvxpy.Problem(obj, constraint_list)
-        # Solve the optimization problem
-        y = prob.solve(solver, verbose)
-        # Update the extremal density estimate
-        dens = x.value
-        # Overwrite negative density estimates to zero
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        # Calculate the shortest path under the new extremal density estimate
-        z = shortest(graph=graph, source=source, target=target, dens=dens)
-        # Augment the constraints
-        constraint_list.append(1 <= z @ x)
+
+    # Reduce the graph, solving over the rescaled density
+    # x = sigma^(1/p) * rho so that the objective stays sum(x^p)
+    work, start, end = graph, source, target
+    if reduce:
+        work, start, end, sigma, expand = reduce_walks(graph, source, target,
+                                                       p=p)
+        scale = sigma ** (-1 / p)
+        if not work.ecount():
+            # No walk joins the source to the target
+            return modcore.Result([0., numpy.zeros(edge_count)],
+                                  trace=modcore.Trace(callback),
+                                  bounds=[0., 0.])
+
+    # Run the basic algorithm with shortest paths as minimum objects
+    walks = walk_oracle(work, start, end, batch=batch)
+
+    def oracle(dens):
+        if reduce and dens is not None:
+            dens = dens * scale
+        z = walks(dens)
+        return z * scale if reduce else z
+    y, dens, session = modcore.density_loop(work.ecount(), oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            seed=seed, rel_gap=rel_gap)
+    if reduce:
+        dens = expand @ (dens * scale)
 
     # Note: Right now, we are getting a scaled density vector,
     # since we are multiplying \rho_i by w_i^(1/p),
@@ -116,47 +485,38 @@ def modulus_walks_density(graph, source, target, p=2,
             print(edge_list[i], rho[i])
         print(p, "-modulus is approximately ", y ** p)
         print("Theoretical error = ", eps)
+    if cache is not None:
+        if reduce:
+            # The paths of the reduced graph do not seed other computations
+            entry = {"mod": float(y ** p), "rho": rho, "mu": None,
+                     "Gamma": scipy.sparse.csr_matrix((edge_count, 0))}
+        else:
+            entry = modcache.session_entry(y ** p, rho, session, p)
+        cache.put(key, near, entry)
     # Return the modulus estimate and the extremal density estimate
-    return([y ** p, rho])
+    return modcore.Result([y ** p, rho], trace=session.trace,
+                          bounds=session.bounds)
 
 
 def modulus_walks_density_inf(graph, source, target,
-                              eps=1e-8, solver=cvxpy.CVXOPT, verbose=0):
+                              eps=1e-8, solver=None, verbose=0,
+                              callback=None, rel_gap=None):
     # Warning: For high values of `p` the following error may obtain:
     # `ZeroDivisionError('Fraction(%s, 0)' % numerator)`
 
     # Store the edge count and edge list
     edge_count = graph.ecount()
     edge_list = graph.get_edgelist()
-    # Create a |E(G)|-by-1 *cvxpy* matrix variable type
-    x = cvxpy.Variable(edge_count)
-
-    # Calculate the infinity norm of the edge count matrix
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, 'inf'))
-    # Store the shortest path under the given edge weights
-    z = shortest(graph=graph, source=source, target=target, dens=None)
-    # Initialize the extremal density estimate
-    dens = numpy.zeros(edge_count)
-    # Initialize the constraints for the optimization problem
-    constraint_list = [x >= 0, 1 <= z @ x]
-    # While the extremal length estimate is not within the error tolerance of 1
+
+    # Run the basic algorithm with the infinity norm as objective
     # Note: A relationship between the tolerance `eps` and the accuracy of `y`
     # has not been proved in the published literature.
     # TEST THE RELATIONSHIP BETWEEN `eps` AND THE ACCURACY OF `y`
-    while (numpy.dot(z, dens) < 1 - eps):
-        # Set up the optimization problem
-        prob = cvxpy.Problem(obj, constraint_list)
-        # Solve the optimization problem
-        y = prob.solve(solver, verbose)
-        # Update the extremal density estimate
-        dens = x.value
-        # Overwrite negative density estimates to zero
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        # Calculate the shortest path under the new extremal density estimate
-        z = shortest(graph=graph, source=source, target=target, dens=dens)
-        # Augment the constraints
-        constraint_list.append(1 <= z @ x)
+    oracle = walk_oracle(graph, source, target)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p='inf',
+                                            eps=eps, solver=solver,
+                                            callback=callback,
+                                            rel_gap=rel_gap)
 
     # Store the final extremal density estimate
     rho = numpy.asarray(dens)
@@ -168,61 +528,420 @@ def modulus_walks_density_inf(graph, source, target,
         print("Infinity-modulus is approximately ", y)
         print("Theoretical error = ", eps)
     # Return the modulus estimate and the extremal density estimate
-    return([y, rho])
+    return modcore.Result([y, rho], trace=session.trace,
+                          bounds=session.bounds)
 
 
 def modulus_walks_full(graph, source, target, p=2,
-                       eps=1e-8, solver=cvxpy.CVXOPT, verbose=False):
+                       eps=1e-8, solver=None, verbose=False,
+                       pmf="solve", batch=1, retire=None, callback=None,
+                       rel_gap=None):
     """
     1. Computes the modulus and extremal density using @Albin2014 Algorithm 1,
         collecting a minimal subfamily in the process.
     2. Computes the modulus and optimal pmf using @Albin2016a Equation 2.9,
-        based on the minimal subfamily.
+        based on the minimal subfamily, or, if `pmf="duals"`, recovers them
+        from the multipliers of the last density solve
+        (`pmf="check"` does both and compares them).
     3. Verifies that the modulus calculations agree.
-    4. Returns the modulus, extremal density, and optimal pmf.
+    4. Returns the moduli, extremal density, optimal pmf, and the minimal
+        subfamily as a sparse |E(G)|-by-|Gamma| matrix, with the trace of
+        the run (see `modcore.Trace`) as the attribute `trace`.
     """
 
     # Estimate the modulus with the extremal density
     # while accumulating a minimal subfamily
     edge_count = graph.ecount()
-    x = cvxpy.Variable(edge_count)
-    obj = cvxpy.Minimize(cvxpy.pnorm(x, p))
-    dens = numpy.zeros(edge_count)
-    z = shortest(graph=graph, source=source, target=target, dens=None)
-    Gamma = z
-    constraint_list = [x >= 0, 1 <= z @ x]
-    while (numpy.dot(z, dens) ** p < 1 - eps):
-        prob = cvxpy.Problem(obj, constraint_list)
-        y = prob.solve(solver, verbose)
-        dens = x.value
-        if numpy.any(dens < 0):
-            dens = numpy.maximum(dens, numpy.zeros(dens.shape))
-        z = shortest(graph=graph, source=source, target=target, dens=dens)
-        Gamma = numpy.c_[Gamma, z]
-        constraint_list.append(1 <= z @ x)
+
+    oracle = walk_oracle(graph, source, target, batch=batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            rel_gap=rel_gap)
+    # Minimal subfamily as a sparse |E(G)|-by-|Gamma| matrix
+    Gamma = session.rows.tocsr().T
     mod1 = y ** p
     rho = numpy.asarray(dens)
 
     # Estimate the modulus with the optimal probability mass function
     # using the minimal subfamily
-    n_objects = Gamma.shape[1]
-    lam = cvxpy.Variable(n_objects)
-    constraint_list = [lam >= 0]
-    obj = cvxpy.Maximize(
-        cvxpy.sum(lam) - (p - 1) * cvxpy.sum(
-            cvxpy.power(
-                Gamma @ lam / p,
-                p / (p - 1)
-            )
-        )
-    )
-    prob = cvxpy.Problem(obj, constraint_list)
-    mod2 = prob.solve(solver, verbose)
-    mu = numpy.asarray(lam.value / sum(lam.value))
+    mod2, mu = modcore.session_mass(session, p=p, solver=solver, pmf=pmf)
 
     # Check that the modulus estimates concord
     diff = abs(mod1-mod2)
     if diff > 1e-7:
         print("Warning: The modulus estimates differ by more than 1e-7")
 
-    return([mod1, mod2, rho, mu, Gamma])
+    return modcore.Result([mod1, mod2, rho, mu, Gamma],
+                         trace=session.trace, bounds=session.bounds)
+
+
+def modulus_walks_path(graph, source, target, ps, eps=1e-8,
+                       solver=None, batch=1, retire=None,
+                       callback=None, rel_gap=None):
+    """
+    Compute the modulus of the family of walks in a graph
+    from a source node to a target node for each of a grid of values of p.
+
+    Each computation starts from the paths accumulated for the previous value
+    of p and from its extremal density, so that neighboring values of p
+    share most of the oracle work.
+
+    Parameters:
+    graph   -- *igraph* object
+    source  -- source node of `graph`
+    target  -- target node of `graph`
+    ps      -- sequence of modulus parameters, best in increasing order
+    eps     -- theoretical error, defaults to 1e-8
+    solver  -- solver backend, see `modulus_walks_density()`
+    batch   -- see `modulus_walks_density()`
+    retire  -- see `modulus_walks_density()`
+    callback -- see `modulus_walks_density()`
+    rel_gap -- see `modulus_walks_density()`
+
+    Returns the array of moduli and the |ps|-by-|E(G)| array of extremal
+    densities, with the traces of the computations as the attribute `traces`
+    and their bounds as the attribute `bounds` (see `modcore.density_path`).
+
+    """
+    oracle = walk_oracle(graph, source, target, batch=batch)
+    return modcore.density_path(graph.ecount(), oracle, ps, eps=eps,
+                                solver=solver, retire=retire,
+                                callback=callback, rel_gap=rel_gap)
+
+
+def modulus_walks_update(graph, source, target, rho, Gamma, add=(),
+                         remove=(), p=2, eps=1e-8, solver=None,
+                         batch=1, retire=None, callback=None, rel_gap=None):
+    """
+    Update the modulus of the family of walks in a graph
+    from a source node to a target node after edges are added and removed.
+
+    The paths of the previous minimal subfamily that avoid the removed edges
+    are still walks of the edited graph, so the basic algorithm resumes from
+    them and from the previous density, and usually needs only a few solves.
+
+    Parameters:
+    graph   -- *igraph* object, before the edit
+    source  -- source node of `graph`
+    target  -- target node of `graph`
+    rho     -- extremal density on `graph`
+    Gamma   -- minimal subfamily on `graph` as an |E(G)|-by-|Gamma| matrix,
+               as returned by `modulus_walks_full()` or this function
+    add     -- pairs of nodes to join by new edges, defaults to none
+    remove  -- indices of the edges of `graph` to remove, defaults to none
+    p, eps, solver, batch, retire, callback, rel_gap -- see
+               `modulus_walks_density()`
+
+    Returns the modulus, the extremal density and the minimal subfamily on the
+    edited graph, and the edited graph, whose edges are those of `graph`
+    without the removed ones, in order, followed by the added ones.
+
+    """
+    edited, mapping = modcore.edit_graph(graph, add=add, remove=remove)
+    edge_count = edited.ecount()
+    warm, seed = modcore.remap_members(rho, Gamma, mapping, edge_count)
+
+    oracle = walk_oracle(edited, source, target, batch=batch)
+    y, dens, session = modcore.density_loop(edge_count, oracle, p=p,
+                                            eps=eps, solver=solver,
+                                            retire=retire, callback=callback,
+                                            seed=seed, warm=warm,
+                                            rel_gap=rel_gap)
+    Gamma = session.rows.tocsr().T
+    return modcore.Result([y ** p, numpy.asarray(dens), Gamma, edited],
+                          trace=session.trace, bounds=session.bounds)
+
+
+def _block_modulus(block, source, target, p, eps, solver, batch, retire,
+                   reduce, rel_gap):
+    # Modulus, extremal density, trace and bounds of the walks across one
+    # block
+    result = modulus_walks_density(block, source, target, p=p, eps=eps,
+                                   solver=solver, batch=batch, retire=retire,
+                                   reduce=reduce, rel_gap=rel_gap)
+    return [result[0], result[1], result.trace, result.bounds]
+
+
+def modulus_walks_blocks(graph, source, target, p=2, eps=1e-8, solver=None,
+                         batch=1, retire=None, reduce=False, workers=None,
+                         rel_gap=None):
+    """
+    Compute the modulus of the family of walks in a graph
+    from a source node to a target node by block decomposition.
+
+    Every walk from the source to the target crosses, in order, the blocks
+    (biconnected components) on the path between them in the block-cut tree,
+    entering and leaving each through a cut node. The modulus of the walks
+    is therefore the series combination
+
+        (sum M_i^(-1/(p-1)))^-(p-1)
+
+    of the moduli M_i of the walks across the blocks, and the extremal
+    density is that of each block scaled by M_i^(-1/(p-1)) over the sum,
+    and zero elsewhere. The blocks are solved independently, in a pool of
+    processes when more than one of them has several edges (a single edge
+    has modulus 1).
+
+    Parameters:
+    graph   -- *igraph* object
+    source  -- source node of `graph`
+    target  -- target node of `graph`
+    p       -- modulus parameter, 1 < p < inf, defaults to 2
+    eps, solver, batch, retire, reduce, rel_gap -- see
+               `modulus_walks_density()`, applied to each block
+    workers -- number of processes, defaults to `None` (the number of
+               processors); 1 solves the blocks in this process
+
+    Returns the modulus estimate and the extremal density estimate, with the
+    traces of the blocks on the route, in order (`None` for single edges),
+    as the attribute `traces`, and the bounds on the modulus combined from
+    those of the blocks (the series rule being increasing in each M_i) as
+    the attribute `bounds`.
+
+    """
+    if p == 'inf' or p <= 1:
+        raise ValueError("The block decomposition requires 1 < p < inf")
+    edges = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    route = _route(graph, source, target)
+    mods = numpy.ones(len(route))
+    rhos = [numpy.ones(1) for _ in route]
+    traces = [None for _ in route]
+    bounds = numpy.ones((len(route), 2))
+    jobs = {}
+    for i, (members, enter, leave) in enumerate(route):
+        if len(members) == 1:
+            continue
+        # Block as a graph of its own, with its nodes numbered in order
+        nodes = numpy.unique(edges[members])
+        block = igraph.Graph(n=len(nodes), directed=graph.is_directed(),
+                             edges=numpy.searchsorted(
+                                 nodes, edges[members]).tolist())
+        jobs[i] = (block, int(numpy.searchsorted(nodes, enter)),
+                   int(numpy.searchsorted(nodes, leave)), p, eps, solver,
+                   batch, retire, reduce, rel_gap)
+    # Largest blocks first, so that the pool finishes together
+    order = sorted(jobs, key=lambda i: -len(route[i][0]))
+    if workers == 1 or len(jobs) < 2:
+        results = {i: _block_modulus(*jobs[i]) for i in order}
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = {i: pool.submit(_block_modulus, *jobs[i])
+                       for i in order}
+            results = {i: futures[i].result() for i in order}
+    for i in results:
+        mods[i], rhos[i], traces[i], bounds[i] = results[i]
+    rho = numpy.zeros(graph.ecount())
+    if not route or numpy.min(mods) <= 0:
+        # No walk joins the source to the target
+        result = modcore.Result([0., rho], bounds=[0., 0.])
+    else:
+        # Series combination of the blocks
+        w = mods ** (-1 / (p - 1))
+        for (members, _, _), rho_i, w_i in zip(route, rhos, w):
+            rho[members] = rho_i * w_i / numpy.sum(w)
+
+        def series(moduli):
+            if numpy.min(moduli) <= 0:
+                return 0.
+            return numpy.sum(moduli ** (-1 / (p - 1))) ** -(p - 1)
+        result = modcore.Result([numpy.sum(w) ** -(p - 1), rho],
+                                bounds=[series(bounds[:, 0]),
+                                        series(bounds[:, 1])])
+    result.traces = traces
+    return result
+
+
+def laplacian_solver(graph, method="direct"):
+    """
+    Factor the Laplacian of an undirected graph, grounded at one node in
+    each connected component, and return a function that takes a
+    |V(G)|-by-k array of currents (summing to zero on each component)
+    and returns the corresponding node potentials.
+
+    Parameters:
+    graph  -- undirected *igraph* object
+    method -- `"direct"` for a sparse LU factorization that is reused
+              by every call, or `"cg"` for conjugate gradients
+
+    Note: Weighted graphs are not supported yet.
+
+    """
+    if graph.is_directed():
+        raise ValueError("The Laplacian solve requires an undirected graph")
+    node_count = graph.vcount()
+    # Signed edge-node incidence matrix (self-loops cancel)
+    ends = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    rows = numpy.repeat(numpy.arange(len(ends)), 2)
+    signs = numpy.tile([1., -1.], len(ends))
+    incidence = scipy.sparse.csr_matrix((signs, (rows, ends.ravel())),
+                                        shape=(len(ends), node_count))
+    laplacian = (incidence.T @ incidence).tocsc()
+    # Ground the first node of each connected component
+    membership = numpy.asarray(graph.components().membership)
+    _, roots = numpy.unique(membership, return_index=True)
+    keep = numpy.setdiff1d(numpy.arange(node_count), roots)
+    grounded = laplacian[keep][:, keep].tocsc()
+    if method == "direct":
+        lu = scipy.sparse.linalg.splu(grounded)
+
+        def solve_grounded(rhs):
+            return lu.solve(rhs)
+    elif method == "cg":
+        # Jacobi preconditioner
+        precond = scipy.sparse.diags(1 / grounded.diagonal())
+
+        def solve_grounded(rhs):
+            sol = numpy.zeros(rhs.shape)
+            for j in range(rhs.shape[1]):
+                sol[:, j] = scipy.sparse.linalg.cg(grounded, rhs[:, j],
+                                                   rtol=1e-12, M=precond)[0]
+            return sol
+    else:
+        raise ValueError("Unknown method: %s" % method)
+
+    def solve(currents):
+        currents = numpy.asarray(currents, dtype=float).reshape(node_count, -1)
+        potentials = numpy.zeros(currents.shape)
+        if len(keep):
+            potentials[keep] = solve_grounded(currents[keep])
+        return potentials
+
+    return solve
+
+
+def modulus_walks_laplacian_pairs(graph, pairs, method="direct",
+                                  solve=None):
+    """
+    Compute the 2-modulus of the family of walks between each of many pairs
+    of nodes of an undirected graph, which equals the effective conductance
+    between them, with one factorization of the graph Laplacian.
+
+    Parameters:
+    graph  -- undirected *igraph* object
+    pairs  -- list of (source, target) pairs of nodes of `graph`
+    method -- `"direct"` or `"cg"`, see `laplacian_solver()`
+    solve  -- solver previously returned by `laplacian_solver(graph)`
+
+    Returns an array of the moduli and a |pairs|-by-|E(G)| array of the
+    extremal densities, which are the potential drops along the edges
+    for a unit potential difference between source and target.
+
+    Note: Weighted graphs are not supported yet.
+
+    """
+    if solve is None:
+        solve = laplacian_solver(graph, method=method)
+    pairs = numpy.asarray(pairs, dtype=int).reshape(-1, 2)
+    ends = numpy.asarray(graph.get_edgelist(), dtype=int).reshape(-1, 2)
+    mods = numpy.zeros(len(pairs))
+    rhos = numpy.zeros((len(pairs), graph.ecount()))
+    # Pairs in different components are joined by no walks
+    membership = numpy.asarray(graph.components().membership)
+    joined = membership[pairs[:, 0]] == membership[pairs[:, 1]]
+    joined &= pairs[:, 0] != pairs[:, 1]
+    idx = numpy.flatnonzero(joined)
+    # Unit current from source to target for every pair at once
+    currents = numpy.zeros((graph.vcount(), len(idx)))
+    currents[pairs[idx, 0], numpy.arange(len(idx))] += 1
+    currents[pairs[idx, 1], numpy.arange(len(idx))] -= 1
+    potentials = solve(currents)
+    # Effective resistance is the potential difference of unit current
+    resistance = (potentials[pairs[idx, 0], numpy.arange(len(idx))] -
+                  potentials[pairs[idx, 1], numpy.arange(len(idx))])
+    mods[idx] = 1 / resistance
+    drops = numpy.abs(potentials[ends[:, 0]] - potentials[ends[:, 1]])
+    rhos[idx] = (drops / resistance).T
+    return([mods, rhos])
+
+
+def modulus_walks_laplacian(graph, source, target, method="direct",
+                            solve=None):
+    """
+    Compute the 2-modulus and extremal density of the family of walks
+    from a source node to a target node of an undirected graph
+    by a single sparse linear solve on the graph Laplacian.
+
+    Parameters:
+    graph  -- undirected *igraph* object
+    source -- source node of `graph`
+    target -- target node of `graph`
+    method -- `"direct"` or `"cg"`, see `laplacian_solver()`
+    solve  -- solver previously returned by `laplacian_solver(graph)`
+
+    Note: Weighted graphs are not supported yet.
+
+    """
+    mods, rhos = modulus_walks_laplacian_pairs(graph, [(source, target)],
+                                               method=method, solve=solve)
+    return([mods[0], rhos[0]])
+
+
+def modulus_walks_mincut(graph, source, target):
+    """
+    Compute the 1-modulus of the family of walks from a source node to
+    a target node, which equals the size of a minimum cut separating them.
+
+    Uses `mincut` from *python-igraph*:
+    http://igraph.org/python/
+
+    Parameters:
+    graph  -- *igraph* object
+    source -- source node of `graph`
+    target -- target node of `graph`
+
+    Returns the modulus, the extremal density (the indicator of the cut)
+    and the edge indices of the cut.
+
+    Note: Weighted graphs are not supported yet.
+
+    """
+    cut = graph.mincut(source=source, target=target)
+    rho = numpy.zeros(graph.ecount())
+    rho[cut.cut] = 1
+    return([float(cut.value), rho, list(cut.cut)])
+
+
+def modulus_walks_distance(graph, source, target):
+    """
+    Compute the infinity-modulus of the family of walks from a source node
+    to a target node, which is the reciprocal of their distance, with the
+    constant extremal density equal to the modulus.
+
+    Uses `distances` from *python-igraph*:
+    http://igraph.org/python/
+
+    Parameters:
+    graph  -- *igraph* object
+    source -- source node of `graph`
+    target -- target node of `graph`
+
+    Note: Weighted graphs are not supported yet.
+
+    """
+    dist = graph.distances(source, target, mode="OUT")[0][0]
+    # No walks from an unreachable target
+    if numpy.isinf(dist):
+        return([0., numpy.zeros(graph.ecount())])
+    return([1 / dist, numpy.full(graph.ecount(), 1 / dist)])
+
+
+def modulus_walks_exact(graph, source, target, p=2):
+    """
+    Compute the modulus of the family of walks from a source node to
+    a target node exactly, for the values of `p` that reduce to
+    combinatorial or linear algebra problems:
+
+    p = 1     -- minimum cut, see `modulus_walks_mincut()`
+    p = 2     -- effective conductance, see `modulus_walks_laplacian()`
+                 (undirected graphs only)
+    p = 'inf' -- distance, see `modulus_walks_distance()`
+
+    """
+    if p == 1:
+        return modulus_walks_mincut(graph, source, target)
+    if p == 2:
+        return modulus_walks_laplacian(graph, source, target)
+    if p == 'inf':
+        return modulus_walks_distance(graph, source, target)
+    raise ValueError("No exact method for p = %s" % p)
@@ -0,0 +1,32 @@
+"""
+Testing file for the batch computations
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+from pmodpy import modbatch, modspans, modwalks
+from pmodpy.examplegraphs import examplegraphs
+
+
+def test_run_batch_routers_kite():
+    routers = examplegraphs.Routers()
+    kite = examplegraphs.Kite()
+    jobs = [{"family": "walks", "graph": routers, "source": 0, "target": t,
+             "options": {"p": 2, "solver": "native"}} for t in [4, 8]]
+    jobs.append({"family": "spans", "graph": kite,
+                 "options": {"p": 2, "solver": "native"}})
+    jobs.append({"family": "subfamily", "graph": kite,
+                 "subfamily": [[0, 2, 3], [1, 2]], "options": {"p": 2}})
+    jobs.append({"family": "cycles", "graph": kite})
+    results = dict(modbatch.run_batch(jobs, workers=2))
+    assert sorted(results) == list(range(len(jobs)))
+    for i in [0, 1]:
+        single = modwalks.modulus_walks_density(routers, 0,
+                                                jobs[i]["target"],
+                                                solver="native")
+        assert abs(results[i][0] - single[0]) < 1e-8
+    single = modspans.modulus_spans_density(kite, solver="native")
+    assert abs(results[2][0] - single[0]) < 1e-8
+    assert abs(results[3][0] - 0.6) < 1e-6
+    assert isinstance(results[4], ValueError)
@@ -0,0 +1,85 @@
+"""
+Testing file for the result cache
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+import igraph
+
+from pmodpy import modcache, modfista, modnative, modspans, modwalks
+from pmodpy.examplegraphs import examplegraphs
+
+
+def test_graph_hash_edge_list():
+    kite = examplegraphs.Kite()
+    assert modcache.graph_hash(kite) == modcache.graph_hash(kite.copy())
+    assert modcache.graph_hash(kite) != \
+        modcache.graph_hash(examplegraphs.House())
+
+
+def test_result_cache_hit_and_near_hit():
+    routers = examplegraphs.Routers()
+    cache = modcache.ResultCache(maxsize=2)
+    first = modwalks.modulus_walks_density(routers, 0, 8, p=2, eps=1e-4,
+                                           solver="native", cache=cache)
+    hit = modwalks.modulus_walks_density(routers, 0, 8, p=2, eps=1e-4,
+                                         solver="native", cache=cache)
+    assert hit.trace is None
+    assert hit[0] == first[0]
+    assert max(abs(hit[1] - first[1])) == 0
+    # A tighter tolerance starts from the cached paths
+    near = modwalks.modulus_walks_density(routers, 0, 8, p=2, eps=1e-10,
+                                          solver="native", cache=cache)
+    fresh = modwalks.modulus_walks_density(routers, 0, 8, p=2, eps=1e-10,
+                                           solver="native")
+    assert abs(near[0] - fresh[0]) < 1e-8
+    assert len(near.trace) < len(fresh.trace)
+    # The least recently used entry is evicted
+    modspans.modulus_spans_density(routers, p=2, solver="native",
+                                   cache=cache)
+    assert len(cache) == 2
+    key, _ = cache.key(routers, "walks", source=0, target=8, p=2, eps=1e-4,
+                       solver="native")
+    assert cache.get(key) is None
+
+
+def test_result_cache_disk(tmp_path):
+    paw = examplegraphs.Paw()
+    cache = modcache.ResultCache(directory=str(tmp_path))
+    first = modspans.modulus_spans_density(paw, p=2, solver="native",
+                                           cache=cache)
+    cache = modcache.ResultCache(directory=str(tmp_path))
+    hit = modspans.modulus_spans_density(paw, p=2, solver="native",
+                                         cache=cache)
+    assert hit.trace is None
+    assert abs(hit[0] - first[0]) < 1e-12
+    key, near = cache.key(paw, "spans", p=2, eps=1e-8, solver="native")
+    entry = cache.get(key)
+    assert entry["Gamma"].shape[0] == paw.ecount()
+    assert abs(entry["mu"].sum() - 1) < 1e-12
+
+
+def test_result_cache_keys_rel_gap():
+    grid = igraph.Graph.Lattice([8, 8], circular=False)
+    cache = modcache.ResultCache()
+    loose = modwalks.modulus_walks_density(grid, 0, 63, solver="native",
+                                           rel_gap=0.05, cache=cache)
+    tight = modwalks.modulus_walks_density(grid, 0, 63, solver="native",
+                                           cache=cache)
+    fresh = modwalks.modulus_walks_density(grid, 0, 63, solver="native")
+    assert abs(tight[0] - fresh[0]) < 1e-8
+    assert abs(loose[0] - fresh[0]) > 1e-6
+
+
+def test_result_cache_key_normalizes_solver_and_p():
+    kite = examplegraphs.Kite()
+    cache = modcache.ResultCache()
+    assert cache.key(kite, "walks", 0, 1, p=2, solver="native") == \
+        cache.key(kite, "walks", 0, 1, p=2.0, solver=modnative.Native())
+    assert cache.key(kite, "walks", 0, 1, p=3,
+                     solver=modfista.FirstOrder()) == \
+        cache.key(kite, "walks", 0, 1, p=3, solver=modfista.FirstOrder())
+    assert cache.key(kite, "walks", 0, 1, p=3,
+                     solver=modfista.FirstOrder(tol=1e-4)) != \
+        cache.key(kite, "walks", 0, 1, p=3, solver=modfista.FirstOrder())
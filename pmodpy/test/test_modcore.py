@@ -0,0 +1,113 @@
+"""
+Testing file for the shared modulus machinery
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+import random
+
+import igraph
+import numpy
+
+from pmodpy import modcore, modspans, modwalks
+from pmodpy.examplegraphs import examplegraphs
+
+
+def test_density_session_kite():
+    # The three paths from node 0 to node 1 in the kite graph
+    session = modcore.DensitySession(4, p=2)
+    for z in [[1, 0, 1, 1], [0, 1, 1, 0]]:
+        session.add(z)
+    y, dens = session.solve()
+    assert len(session) == 2
+    assert abs(y ** 2 - 0.6) < 1e-4
+    assert max(abs(dens - [i/5 for i in [1, 2, 3, 1]])) < 1e-4
+
+
+def test_minimal_subfamily_dedup():
+    Gamma = modcore.MinimalSubfamily(4, capacity=1)
+    assert Gamma.append([1, 0, 1, 1]) == [0, True]
+    assert Gamma.append([0, 1, 1, 0]) == [1, True]
+    assert Gamma.append([1, 0, 1, 1]) == [0, False]
+    assert len(Gamma) == 2
+    assert list(Gamma.member(1)) == [1, 2]
+    assert numpy.array_equal(Gamma.tocsr().toarray(),
+                             [[1, 0, 1, 1], [0, 1, 1, 0]])
+
+
+def test_session_retires_and_reinstates_rows():
+    session = modcore.DensitySession(4, p=2, retire=1)
+    session.add([1, 1, 1, 1])
+    session.add([0, 1, 1, 0])
+    # The long path is slack under this density
+    session.update_pool(numpy.array([0.2, 0.5, 0.5, 0.2]))
+    assert list(session.active) == [False, True]
+    # Adding it again brings it back
+    changes = session.changes
+    assert session.add([1, 1, 1, 1]) == 0
+    assert list(session.active) == [True, True]
+    assert session.changes == changes + 1
+
+
+def test_edit_graph_remaps_members():
+    kite = examplegraphs.Kite()
+    edited, mapping = modcore.edit_graph(kite, add=[(0, 1)], remove=[1])
+    assert list(mapping) == [0, -1, 1, 2]
+    assert edited.get_edgelist() == [(0, 2), (1, 3), (2, 3), (0, 1)]
+    # Walks 0-3-1 and 0-2-3-1, the first of which uses the removed edge
+    Gamma = numpy.array([[0, 1], [1, 0], [1, 1], [0, 1]])
+    warm, seed = modcore.remap_members([1, 2, 3, 4], Gamma, mapping,
+                                       edited.ecount())
+    assert list(warm) == [1, 3, 4, 0]
+    assert seed.toarray().tolist() == [[1, 1, 1, 0]]
+
+
+def test_density_session_power_cone():
+    # Non-integer p through power cones agrees with the p-norm objective
+    values = []
+    for cone in [True, False]:
+        session = modcore.DensitySession(4, p=2.37, solver="CLARABEL",
+                                         cone=cone)
+        for z in [[1, 0, 1, 1], [0, 1, 1, 0]]:
+            session.add(z)
+        y, dens = session.solve()
+        values.append(y)
+    assert abs(values[0] - values[1]) < 1e-5
+    mod, mu = modcore.solve_mass(numpy.array([[1, 0, 1, 1], [0, 1, 1, 0]]),
+                                 p=2.37, solver="CLARABEL")
+    assert abs(mod - values[0] ** 2.37) < 1e-5
+
+
+def test_density_loop_retires_rows_with_cvxpy():
+    # Interior-point multipliers of slack rows are tiny but positive
+    rng = numpy.random.default_rng(0)
+    graph = igraph.Graph(n=40, edges=rng.integers(0, 40, (100, 2)).tolist())
+    graph.simplify()
+
+    def oracle(dens):
+        return modwalks.shortest(graph, 0, 1, dens)
+    y, dens, session = modcore.density_loop(graph.ecount(), oracle, p=2,
+                                            solver="CVXOPT", retire=1)
+    assert numpy.count_nonzero(session.active) < len(session)
+    full = modwalks.modulus_walks_density(graph, 0, 1, solver="native")
+    assert abs(y ** 2 - full[0]) < 1e-6
+
+
+def test_session_mass_check_compares_pmfs(capsys):
+    routers = examplegraphs.Routers()
+    routers_mod = modwalks.modulus_walks_full(routers, 0, 14, p=2,
+                                              solver="native", pmf="check")
+    assert abs(routers_mod[1] - 0.741024) < 1e-6
+    assert "Warning" not in capsys.readouterr().out
+
+
+def test_session_mass_check_accepts_interior_point_duals(capsys):
+    for seed in [4, 6]:
+        igraph.set_random_number_generator(random.Random(seed))
+        graph = igraph.Graph.Erdos_Renyi(n=15, m=35)
+        modwalks.modulus_walks_full(graph, 0, 14, p=2, solver="CVXOPT",
+                                    pmf="check")
+        modspans.modulus_spans_full(graph, p=3, solver="CLARABEL",
+                                    pmf="check")
+    assert "pmfs differ" not in capsys.readouterr().out
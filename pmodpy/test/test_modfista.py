@@ -0,0 +1,36 @@
+"""
+Testing file for the first-order engine
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+from pmodpy import modfista, modspans, modsubfamily, modwalks
+from pmodpy.examplegraphs import examplegraphs
+
+
+def test_modulus_walks_density_routers_fista():
+    routers = examplegraphs.Routers()
+    native = modwalks.modulus_walks_density(routers, 0, 8, p=2,
+                                            solver="native")
+    fista = modwalks.modulus_walks_density(routers, 0, 8, p=2,
+                                           solver="fista")
+    assert abs(fista[0] - native[0]) < 1e-5
+    assert max(abs(fista[1] - native[1])) < 1e-4
+
+
+def test_modulus_spans_density_paw_fista():
+    paw = examplegraphs.Paw()
+    paw_mod = modspans.modulus_spans_density(
+        paw, p=3, solver=modfista.FirstOrder(tol=1e-9))
+    exact = modspans.modulus_spans_exact(paw, p=3)
+    assert abs(paw_mod[0] - exact[0]) < 1e-7
+
+
+def test_solve_mass_paw_fista():
+    paw = examplegraphs.Paw()
+    trees = [[0, 1, 2], [0, 1, 3], [0, 2, 3]]
+    mod, mu = modsubfamily.modulus_subfamily_mass(paw, trees, p=2,
+                                                  solver="fista")
+    assert abs(mod - 3/7) < 1e-5
+    assert max(abs(mu - 1/3)) < 1e-3
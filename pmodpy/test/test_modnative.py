@@ -0,0 +1,46 @@
+"""
+Testing file for the native engine
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+import numpy
+import scipy.linalg
+
+from pmodpy import modcore, modnative
+
+
+def test_delete_downdates_cholesky():
+    rng = numpy.random.default_rng(0)
+    session = modnative.NativeSession(30)
+    for z in rng.integers(0, 2, (12, 30)):
+        session.add(z + numpy.eye(30)[len(session)])
+    for j in range(12):
+        session._append(j)
+    for i in [11, 4, 0, 5]:
+        session._delete(i)
+        P = session.passive
+        m = len(P)
+        expected = scipy.linalg.cholesky(session.gram[numpy.ix_(P, P)],
+                                         lower=True)
+        assert numpy.allclose(session.chol[:m, :m], expected)
+        assert numpy.allclose(session.cols[:12, :m], session.gram[:12, P])
+
+
+def test_native_session_matches_cvxpy():
+    rng = numpy.random.default_rng(1)
+    rows = rng.integers(0, 2, (40, 25))
+    rows[:, 0] = 1
+    native = modnative.NativeSession(25)
+    reference = modcore.DensitySession(25, solver="CLARABEL")
+    for z in rows:
+        native.add(z)
+        reference.add(z)
+        # Solve after every row so that members leave the passive set
+        y, dens = native.solve()
+        assert abs(y - reference.solve()[0]) < 1e-6
+    m = len(native.passive)
+    P = native.passive
+    assert numpy.allclose(native.chol[:m, :m], scipy.linalg.cholesky(
+        native.gram[numpy.ix_(P, P)], lower=True))
@@ -0,0 +1,56 @@
+"""
+Testing file for the solver registry
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+import subprocess
+import sys
+
+from pmodpy import modsolvers, modwalks
+from pmodpy.examplegraphs import examplegraphs
+
+
+def test_select_by_p_and_size():
+    assert modsolvers.select(p=2) == "native"
+    assert modsolvers.select(p=3, size=10 ** 6) == "fista"
+    assert modsolvers.select(p=3) in modsolvers.PREFERENCE
+    assert modsolvers.select(p='inf', size=10 ** 6) in modsolvers.PREFERENCE
+    assert "native" in modsolvers.available()
+
+
+def test_resolve_engines():
+    assert hasattr(modsolvers.resolve("native"), "open_session")
+    assert hasattr(modsolvers.resolve(None, p=1.5, size=10 ** 6),
+                   "solve_mass")
+    assert modsolvers.resolve("SCS", p=3) == "SCS"
+
+
+def test_import_is_lazy():
+    code = ("import sys; import pmodpy.modwalks, pmodpy.modspans, "
+            "pmodpy.modsubfamily; print('cvxpy' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == "False"
+
+
+def test_modulus_walks_density_kite_auto():
+    kite = examplegraphs.Kite()
+    for p in [2, 3]:
+        kite_mod = modwalks.modulus_walks_density(kite, 0, 1, p=p)
+        assert abs(kite_mod[0] - modwalks.modulus_walks_density(
+            kite, 0, 1, p=p, solver="CLARABEL")[0]) < 1e-5
+
+
+def test_power_cone_for_non_integer_p():
+    assert modsolvers.select(p=2.37) in modsolvers.POWER_CONE
+    assert modsolvers.power_cone("CLARABEL", 1.5)
+    assert not modsolvers.power_cone("CLARABEL", 3)
+    assert not modsolvers.power_cone("CVXOPT", 1.5)
+
+
+def test_installed_knows_every_power_cone_solver():
+    assert set(modsolvers.POWER_CONE) <= set(modsolvers.CVXPY_SOLVERS)
+    assert not modsolvers.installed("NOPE")
+    assert modsolvers.installed("native")
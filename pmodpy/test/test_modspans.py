@@ -5,6 +5,10 @@ To run testing unit, go to root of project and run on shell:
 py.test
 """
 
+import cvxpy
+import igraph
+import numpy
+
 from pmodpy import modspans
 from pmodpy.examplegraphs import examplegraphs
 
@@ -29,3 +33,69 @@ def test_modulus_spans_density_routers():
     routers_mod = modspans.modulus_spans_density(routers, p=2)
     assert abs(routers_mod[0] - mod_report) < 1e-5
     assert max(abs(routers_mod[1] / routers_mod[0] - rho_mod_report)) < 1e-3
+
+
+def test_modulus_spans_density_routers_native():
+    routers = examplegraphs.Routers()
+    routers_mod = modspans.modulus_spans_density(routers, p=2,
+                                                 solver="native")
+    assert abs(routers_mod[0] - 0.11734) < 1e-5
+
+
+def test_modulus_spans_density_paw_batch():
+    paw = examplegraphs.Paw()
+    paw_mod = modspans.modulus_spans_density(paw, p=2, batch=3)
+    assert abs(paw_mod[0] - 3/7) < 1e-5
+
+
+def test_modulus_spans_update_routers():
+    routers = examplegraphs.Routers()
+    full = modspans.modulus_spans_full(routers, p=2, solver="native",
+                                       pmf="duals")
+    update = modspans.modulus_spans_update(routers, full[2], full[4],
+                                           add=[(0, 5)], remove=[2],
+                                           solver="native")
+    fresh = modspans.modulus_spans_density(update[3], p=2, solver="native")
+    assert abs(update[0] - fresh[0]) < 1e-6
+
+
+def test_modulus_spans_exact():
+    paw = examplegraphs.Paw()
+    paw_mod, paw_rho, paw_cores = modspans.modulus_spans_exact(paw)
+    assert abs(paw_mod - 3/7) < 1e-12
+    assert max(abs(paw_rho - [i/7 for i in [3, 2, 2, 2]])) < 1e-12
+    assert [core[0] for core in paw_cores] == [1.5, 1]
+    routers = examplegraphs.Routers()
+    routers_mod = modspans.modulus_spans_exact(routers, p=3)
+    density_mod = modspans.modulus_spans_density(routers, p=3,
+                                                 solver=cvxpy.CLARABEL)
+    assert abs(routers_mod[0] - density_mod[0]) < 1e-5
+    assert max(abs(routers_mod[1] - density_mod[1])) < 1e-4
+
+
+def test_fairest_usage_grid_and_large_multiplicities():
+    grid = igraph.Graph.Lattice([40, 40], circular=False)
+    eta, cores = modspans.fairest_usage(grid)
+    assert len(cores) == 1
+    assert max(abs(eta - 1599 / grid.ecount())) < 1e-12
+    big = 10 ** 12
+    theta, core = modspans._densest_core(3, numpy.array([0, 1, 0]),
+                                         numpy.array([1, 2, 2]),
+                                         numpy.array([big, big, 1]))
+    assert theta == (2 * big + 1, 2) and list(core) == [0, 1, 2]
+
+
+def test_spanning_tree_oracle_routers():
+    routers = examplegraphs.Routers()
+    oracle = modspans.SpanningTreeOracle(routers)
+    rng = numpy.random.default_rng(0)
+    for _ in range(10):
+        dens = rng.random(routers.ecount())
+        tree = oracle.edges(dens)
+        assert len(tree) == routers.vcount() - 1
+        assert abs(sum(dens[tree]) -
+                   modspans.spantree(routers, dens) @ dens) < 1e-12
+    trees = modspans.SpanningTreeOracle(routers, k=4)(dens)
+    assert trees.shape[1] == routers.ecount()
+    assert list(trees.sum(axis=1)) == [routers.vcount() - 1] * len(trees)
+    assert abs(trees[0] @ dens - sum(dens[tree])) < 1e-12
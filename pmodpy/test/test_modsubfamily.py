@@ -0,0 +1,53 @@
+"""
+Testing file for subfamily modulus
+Uses py.test
+To run testing unit, go to root of project and run on shell:
+py.test
+"""
+
+import numpy
+
+from pmodpy import modsubfamily
+from pmodpy.examplegraphs import examplegraphs
+
+
+# The spanning trees of the paw graph
+paw_trees = [[0, 1, 2], [0, 1, 3], [0, 2, 3]]
+
+
+def test_get_minimum_paw():
+    paw = examplegraphs.Paw()
+    dens = [1, 3, 2, 1]
+    assert list(modsubfamily.get_minimum(paw, paw_trees, dens)) == [1, 0, 1, 1]
+    index = modsubfamily.subfamily_index(paw, paw_trees)
+    smallest = modsubfamily.get_minimum(paw, index, dens, k=2)
+    assert numpy.array_equal(smallest, [[1, 0, 1, 1], [1, 1, 0, 1]])
+
+
+def test_modulus_subfamily_density_paw():
+    paw = examplegraphs.Paw()
+    paw_mod = modsubfamily.modulus_subfamily_density(paw, paw_trees, p=2)
+    assert abs(paw_mod[0] - 3/7) < 1e-5
+    assert max(abs(paw_mod[1] - [i/7 for i in [3, 2, 2, 2]])) < 1e-5
+
+
+def test_modulus_subfamily_mass_paw():
+    paw = examplegraphs.Paw()
+    paw_mod = modsubfamily.modulus_subfamily_mass(paw, paw_trees, p=2)
+    assert abs(paw_mod[0] - 3/7) < 1e-5
+    assert max(abs(paw_mod[1] - 1/3)) < 1e-4
+
+
+def test_modulus_subfamily_density_paw_batch():
+    paw = examplegraphs.Paw()
+    paw_mod = modsubfamily.modulus_subfamily_density(paw, paw_trees, p=2,
+                                                     batch=2)
+    assert abs(paw_mod[0] - 3/7) < 1e-5
+
+
+def test_modulus_subfamily_path_paw():
+    paw = examplegraphs.Paw()
+    mods, rhos = modsubfamily.modulus_subfamily_path(paw, paw_trees, [2, 3])
+    for p, mod in zip([2, 3], mods):
+        single = modsubfamily.modulus_subfamily_density(paw, paw_trees, p=p)
+        assert abs(mod - single[0]) < 1e-4
@@ -5,7 +5,13 @@ To run testing unit, go to root of project and run on shell:
 py.test
 """
 
-from pmodpy import modwalks
+import json
+
+import cvxpy
+import igraph
+import numpy
+
+from pmodpy import modcore, modwalks
 from pmodpy.examplegraphs import examplegraphs
 
 
@@ -68,3 +74,192 @@ def test_modulus_walks_density_shakeri1d():
     shakeri1d = examplegraphs.Shakeri_1d()
     shakeri1d_mod = modwalks.modulus_walks_density(shakeri1d, 0, 8, p=2)
     assert abs(shakeri1d_mod[0] - 0.5169) < 1e-4
+
+
+def test_modulus_walks_full_routers_native():
+    routers = examplegraphs.Routers()
+    mod_report = 0.741024
+    routers_mod = modwalks.modulus_walks_full(routers, 0, 14, p=2, eps=1e-15,
+                                              solver="native")
+    assert abs(routers_mod[0] - mod_report) < 1e-6
+    assert abs(routers_mod[1] - mod_report) < 1e-6
+
+
+def test_modulus_walks_full_routers_duals():
+    routers = examplegraphs.Routers()
+    mod_report = 0.741024
+    routers_mod = modwalks.modulus_walks_full(routers, 0, 14, p=2, eps=1e-15,
+                                              pmf="duals")
+    assert abs(routers_mod[1] - mod_report) < 1e-6
+    assert abs(sum(routers_mod[3]) - 1) < 1e-9
+    assert routers_mod[3].shape == (routers_mod[4].shape[1],)
+
+
+def test_modulus_walks_laplacian_kite():
+    kite = examplegraphs.Kite()
+    kite_mod = modwalks.modulus_walks_laplacian(kite, 0, 1)
+    assert abs(kite_mod[0] - 0.6) < 1e-10
+    assert max(abs(kite_mod[1] - [i/5 for i in [1, 2, 3, 1]])) < 1e-10
+
+
+def test_modulus_walks_laplacian_pairs_routers():
+    routers = examplegraphs.Routers()
+    solve = modwalks.laplacian_solver(routers)
+    mods, rhos = modwalks.modulus_walks_laplacian_pairs(
+        routers, [(0, 14), (14, 0), (3, 3)], solve=solve
+    )
+    assert abs(mods[0] - 0.741024) < 1e-6
+    assert abs(mods[1] - mods[0]) < 1e-12
+    assert mods[2] == 0
+
+
+def test_modulus_walks_exact_endpoints():
+    routers = examplegraphs.Routers()
+    mod_1 = modwalks.modulus_walks_exact(routers, 0, 14, p=1)
+    assert mod_1[0] == 2
+    assert sorted(mod_1[2]) == [21, 22]
+    assert sum(mod_1[1]) == mod_1[0]
+    mod_inf = modwalks.modulus_walks_exact(routers, 0, 14, p='inf')
+    routers_inf = modwalks.modulus_walks_density_inf(routers, 0, 14)
+    assert abs(mod_inf[0] - 0.25) < 1e-12
+    assert abs(routers_inf[0] - mod_inf[0]) < 1e-6
+
+
+def test_modulus_walks_density_routers_batch():
+    routers = examplegraphs.Routers()
+    routers_mod = modwalks.modulus_walks_density(routers, 0, 14, p=2,
+                                                 batch=8)
+    assert abs(routers_mod[0] - 0.741024) < 1e-6
+
+
+def test_modulus_walks_density_kite_trace():
+    kite = examplegraphs.Kite()
+    records = []
+    kite_mod = modwalks.modulus_walks_density(kite, 0, 1, p=2,
+                                              callback=records.append)
+    trace = kite_mod.trace
+    assert records == trace.records
+    assert [r["iteration"] for r in records] == list(range(len(records)))
+    assert records[-1]["length"] >= 1 - 1e-8
+    assert trace.summary()["iterations"] == len(records) - 1
+    assert json.loads(trace.to_json())["records"][0]["members"] == \
+        records[0]["members"]
+    # Without a callback, the members are left out
+    quiet = modwalks.modulus_walks_density(kite, 0, 1, p=2)
+    assert all("members" not in r for r in quiet.trace.records)
+    assert len(quiet.trace) == len(records)
+    kept = modcore.Trace()
+    modwalks.modulus_walks_density(kite, 0, 1, p=2, callback=kept)
+    assert kept.records[0]["members"] == records[0]["members"]
+
+
+def test_modulus_walks_path_routers():
+    routers = examplegraphs.Routers()
+    ps = [1.5, 2, 3]
+    mods, rhos = modwalks.modulus_walks_path(routers, 0, 8, ps,
+                                             solver=cvxpy.CLARABEL)
+    assert rhos.shape == (len(ps), routers.ecount())
+    for p, mod, rho in zip(ps, mods, rhos):
+        single = modwalks.modulus_walks_density(routers, 0, 8, p=p,
+                                                solver=cvxpy.CLARABEL)
+        assert abs(mod - single[0]) < 1e-4
+        assert max(abs(rho - single[1])) < 1e-3
+
+
+def test_modulus_walks_update_routers():
+    routers = examplegraphs.Routers()
+    full = modwalks.modulus_walks_full(routers, 0, 8, p=2, solver="native",
+                                       pmf="duals")
+    update = modwalks.modulus_walks_update(routers, 0, 8, full[2], full[4],
+                                           add=[(0, 8)], remove=[3, 10],
+                                           solver="native")
+    edited = update[3]
+    assert edited.ecount() == routers.ecount() - 1
+    fresh = modwalks.modulus_walks_density(edited, 0, 8, solver="native")
+    assert abs(update[0] - fresh[0]) < 1e-6
+    assert len(update.trace) < len(fresh.trace)
+
+
+def test_modulus_walks_density_reduce():
+    # Kite with the edge (1, 3) subdivided twice, a doubled edge (0, 2)
+    # and a dangling path off node 3
+    graph = igraph.Graph(n=7, edges=[(0, 2), (0, 3), (2, 3), (3, 4), (4, 5),
+                                     (5, 1), (0, 2), (3, 6)])
+    reduced, source, target, sigma, expand = modwalks.reduce_walks(
+        graph, 0, 1, p=2.5
+    )
+    # The graph is series-parallel between the two nodes
+    assert reduced.ecount() == 1
+    assert expand.shape == (graph.ecount(), 1)
+    assert not expand[7].nnz
+    for p in [2, 2.5]:
+        full = modwalks.modulus_walks_density(graph, 0, 1, p=p,
+                                              solver=cvxpy.CLARABEL)
+        cut = modwalks.modulus_walks_density(graph, 0, 1, p=p,
+                                             solver=cvxpy.CLARABEL,
+                                             reduce=True)
+        assert abs(full[0] - cut[0]) < 1e-6
+        assert max(abs(full[1] - cut[1])) < 1e-3
+
+
+def test_modulus_walks_blocks_kites():
+    # Two kites glued at node 1, followed by a bridge from node 5 to node 6
+    graph = igraph.Graph(n=7, edges=[(0, 2), (0, 3), (2, 3), (3, 1), (1, 4),
+                                     (1, 5), (4, 5), (5, 4), (5, 6)])
+    for p, solver in [(2, "native"), (3, cvxpy.CLARABEL)]:
+        mono = modwalks.modulus_walks_density(graph, 0, 6, p=p, solver=solver)
+        for workers in [1, 2]:
+            blocks = modwalks.modulus_walks_blocks(graph, 0, 6, p=p,
+                                                   solver=solver,
+                                                   workers=workers)
+            assert abs(mono[0] - blocks[0]) < 1e-6
+            assert max(abs(mono[1] - blocks[1])) < 1e-4
+            assert blocks.traces[-1] is None
+
+
+def test_shortest_path_oracle_routers():
+    routers = examplegraphs.Routers()
+    oracle = modwalks.ShortestPathOracle(routers, 0, 8)
+    assert sum(oracle(None)) == sum(modwalks.shortest(routers, 0, 8))
+    rng = numpy.random.default_rng(0)
+    for _ in range(10):
+        dens = rng.random(routers.ecount())
+        z = oracle(dens)
+        assert abs(z @ dens - modwalks.shortest(routers, 0, 8, dens) @ dens) \
+            < 1e-12
+    # Raising the density off the last path keeps it without a search
+    last = oracle.edges(dens)
+    dens[numpy.setdiff1d(numpy.arange(routers.ecount()), last)] += 1
+    assert oracle.edges(dens) is last
+
+
+def test_modulus_walks_density_rel_gap():
+    graph = igraph.Graph.Lattice([8, 8], circular=False)
+    tight = modwalks.modulus_walks_density(graph, 0, 63, solver="native")
+    loose = modwalks.modulus_walks_density(graph, 0, 63, solver="native",
+                                           rel_gap=1e-2)
+    lower, upper = loose.bounds
+    assert lower <= tight[0] + 1e-9 and tight[0] <= upper + 1e-9
+    assert upper - lower <= 1e-2 * upper
+    assert len(loose.trace) < len(tight.trace)
+    records = loose.trace.records
+    assert all(r["lower"] <= r["upper"] for r in records)
+    assert records[-1]["lower"] == lower
+
+
+def test_modulus_walks_density_bounds_do_not_cross():
+    routers = examplegraphs.Routers()
+    routers_mod = modwalks.modulus_walks_density(routers, 0, 14,
+                                                 solver="native")
+    lower, upper = routers_mod.bounds
+    assert lower <= routers_mod[0] + 1e-9 and lower <= upper
+    graph = igraph.Graph.Lattice([10, 10], circular=False)
+    loose = modwalks.modulus_walks_density(graph, 0, 99, p=2.5,
+                                           solver="CLARABEL", rel_gap=1e-3)
+    lower, upper = loose.bounds
+    assert all(r["lower"] <= r["upper"] for r in loose.trace.records)
+    # Stopped on the gap, the density is admissible and of energy upper
+    length = graph.distances(0, 99, weights=list(loose[1]))[0][0]
+    assert length >= 1 - 1e-9
+    assert abs(numpy.sum(loose[1] ** 2.5) - upper) < 1e-9 * upper
+    assert abs(loose[0] - upper) < 1e-9 * upper
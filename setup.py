@@ -16,5 +16,6 @@ setup(
         "python-igraph",
         "cvxpy",
         "numpy",
+        "scipy",
     ],
 )